@@ -0,0 +1,605 @@
+"""Browser helpers shared by the Dell driver downloader scripts"""
+import json, os, shutil, socket, threading, time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+# Default ceiling (seconds) for any single readiness wait
+READY_TIMEOUT = 20
+
+DROPDOWN_SELECTORS = [
+    "button[aria-haspopup='listbox']",
+    "select[name*='os']",
+    "select[id*='os']",
+    ".dropdown-toggle",
+    "[role='combobox']",
+    "button[aria-expanded='false']",
+    "button[data-toggle='dropdown']"
+]
+
+BIN_LINK_COUNT_JS = """
+var count = 0;
+var links = document.getElementsByTagName('a');
+for (var i = 0; i < links.length; i++) {
+    var href = links[i].getAttribute('href') || '';
+    if (href.toLowerCase().indexOf('.bin') !== -1) { count++; }
+}
+return count;
+"""
+
+# The .bin hrefs themselves, as find_bin_files() sees them, to tell two listings apart
+BIN_LINKS_JS = """
+var hrefs = [];
+var links = document.getElementsByTagName('a');
+for (var i = 0; i < links.length; i++) {
+    if (links[i].href && /\\.bin$/i.test(links[i].href)) { hrefs.push(links[i].href); }
+}
+return hrefs;
+"""
+
+LISTBOX_EXPANDED_JS = """
+if (document.querySelector("[aria-expanded='true'], [role='listbox'], [role='option']")) { return true; }
+var opts = document.querySelectorAll('[data-value]');
+for (var i = 0; i < opts.length; i++) {
+    if (opts[i].offsetParent !== null) { return true; }
+}
+return false;
+"""
+
+DROPDOWN_PRESENT_JS = "return document.querySelector(arguments[0]) !== null;"
+
+# Text of the OS dropdown toggles, used to confirm which OS the page shows
+SELECTED_OS_JS = """
+var texts = [];
+var toggles = document.querySelectorAll("button[aria-haspopup='listbox'], [role='combobox'], select[name*='os'], select[id*='os']");
+for (var i = 0; i < toggles.length; i++) {
+    var el = toggles[i];
+    var text = el.tagName === 'SELECT' && el.selectedIndex >= 0 ? el.options[el.selectedIndex].text : el.textContent;
+    if (text) { texts.push(text.trim()); }
+}
+return texts;
+"""
+
+# Collect everything find_bin_files() looks at in one WebDriver round-trip
+HARVEST_JS = """
+var result = {hrefs: [], data: [], onclick: []};
+var links = document.getElementsByTagName('a');
+for (var i = 0; i < links.length; i++) {
+    if (links[i].href) { result.hrefs.push(links[i].href); }
+}
+var elements = document.querySelectorAll('*');
+for (var i = 0; i < elements.length; i++) {
+    var attrs = elements[i].attributes;
+    for (var j = 0; j < attrs.length; j++) {
+        var name = attrs[j].name;
+        if (name.indexOf('data-') === 0 && attrs[j].value) { result.data.push(attrs[j].value); }
+        else if (name === 'onclick' && attrs[j].value) { result.onclick.push(attrs[j].value); }
+    }
+}
+return result;
+"""
+
+# Requests the driver listing never needs, blocked through CDP Network.setBlockedURLs.
+# Dell's own scripts and XHRs are left alone so the listing still renders.
+BLOCKED_URL_PATTERNS = [
+    # Images, fonts and media
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    # Analytics, tag managers, ads and chat
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googleadservices.com*", "*facebook.net*", "*facebook.com/tr*", "*bat.bing.com*",
+    "*linkedin.com/px*", "*ads.linkedin.com*", "*hotjar.com*", "*demdex.net*",
+    "*omtrdc.net*", "*adobedtm.com*", "*tiqcdn.com*", "*nr-data.net*", "*newrelic.com*",
+    "*qualtrics.com*", "*liveperson.net*", "*lpsnmedia.net*", "*youtube.com*", "*ytimg.com*",
+    "*brightcove*", "*twitter.com*", "*t.co/*",
+]
+
+
+
+class PageReadiness:
+    """Wait on real page conditions instead of fixed sleeps.
+
+    Every wait is given the length of the fixed sleep it replaces so the
+    wall-clock saved can be reported per OS.
+    """
+
+    def __init__(self, driver, timeout=READY_TIMEOUT, settle=1.5, poll=0.25, empty_grace=5.0):
+        self.driver = driver
+        self.timeout = timeout
+        self.settle = settle
+        self.poll = poll
+        self.empty_grace = empty_grace
+        self.waited = 0.0
+        self.replaced = 0.0
+
+    def reset(self):
+        self.waited = 0.0
+        self.replaced = 0.0
+
+    def _record(self, started, legacy_sleep):
+        elapsed = time.monotonic() - started
+        self.waited += elapsed
+        self.replaced += legacy_sleep
+        return elapsed
+
+    def _until(self, condition, timeout):
+        from selenium.common.exceptions import WebDriverException
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            try:
+                if condition():
+                    return True
+            except WebDriverException:
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll)
+
+    def wait_for_document(self, legacy_sleep=0, timeout=None):
+        """Wait until document.readyState is 'complete'"""
+        started = time.monotonic()
+        ok = self._until(
+            lambda: self.driver.execute_script("return document.readyState") == "complete",
+            timeout)
+        self._record(started, legacy_sleep)
+        return ok
+
+    def wait_for_dropdown(self, legacy_sleep=0, timeout=None):
+        """Wait until any of the known OS dropdown selectors is present"""
+        started = time.monotonic()
+
+        def present():
+            return any(self.driver.execute_script(DROPDOWN_PRESENT_JS, selector)
+                       for selector in DROPDOWN_SELECTORS)
+
+        ok = self._until(present, timeout)
+        elapsed = self._record(started, legacy_sleep)
+        print(f"  Dropdown {'ready' if ok else 'not found'} after {elapsed:.2f}s")
+        return ok
+
+    def wait_for_listbox(self, legacy_sleep=0, timeout=None):
+        """Wait until the OS listbox has been expanded"""
+        started = time.monotonic()
+        ok = self._until(lambda: self.driver.execute_script(LISTBOX_EXPANDED_JS), timeout)
+        elapsed = self._record(started, legacy_sleep)
+        print(f"  Listbox {'expanded' if ok else 'not expanded'} after {elapsed:.2f}s")
+        return ok
+
+    def count_bin_links(self):
+        from selenium.common.exceptions import WebDriverException
+        try:
+            return self.driver.execute_script(BIN_LINK_COUNT_JS) or 0
+        except WebDriverException:
+            return 0
+
+    def bin_links(self):
+        from selenium.common.exceptions import WebDriverException
+        try:
+            return set(self.driver.execute_script(BIN_LINKS_JS) or [])
+        except WebDriverException:
+            return set()
+
+    def wait_for_bin_links(self, legacy_sleep=0, timeout=None, previous=None):
+        """Wait until the number of .bin anchors stops changing.
+
+        Returns the settled count. A count of zero is only accepted once
+        `empty_grace` seconds have passed, so the wait does not return
+        before the listing has had a chance to start loading.
+
+        `previous` is the set of .bin links shown before an in-place OS
+        switch. The old listing stays on screen until the new one renders,
+        so the count only settles once the links differ from `previous` or
+        the count has changed on the way; if neither happens, 0 is returned.
+        """
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        last_count = self.count_bin_links()
+        stable_since = time.monotonic()
+        changed = previous is None
+
+        while time.monotonic() < deadline:
+            time.sleep(self.poll)
+            count = self.count_bin_links()
+            now = time.monotonic()
+            if count != last_count:
+                last_count = count
+                stable_since = now
+                changed = True
+                continue
+            if not changed:
+                if self.bin_links() == previous:
+                    continue
+                changed = True
+                stable_since = now
+                continue
+            if now - stable_since >= self.settle and (count > 0 or now - started >= self.empty_grace):
+                break
+
+        elapsed = self._record(started, legacy_sleep)
+        if not changed:
+            print(f"  .bin listing unchanged after {elapsed:.2f}s, still showing the previous OS")
+            return 0
+        print(f"  .bin link count settled at {last_count} after {elapsed:.2f}s")
+        return last_count
+
+    def report(self, label):
+        saved = self.replaced - self.waited
+        print(f"Readiness for {label}: waited {self.waited:.1f}s instead of "
+              f"{self.replaced:.1f}s of fixed sleeps (saved {saved:.1f}s)")
+        return saved
+
+
+class _HarvestParser(HTMLParser):
+    """Offline equivalent of HARVEST_JS over a page_source snapshot"""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.result = {"hrefs": [], "data": [], "onclick": []}
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if not value:
+                continue
+            if tag == "a" and name == "href":
+                self.result["hrefs"].append(urljoin(self.base_url, value))
+            elif name.startswith("data-"):
+                self.result["data"].append(value)
+            elif name == "onclick":
+                self.result["onclick"].append(value)
+
+
+def parse_page_source(page_source, base_url=""):
+    parser = _HarvestParser(base_url)
+    parser.feed(page_source)
+    parser.close()
+    return parser.result
+
+
+def harvest_page(driver):
+    """Return every anchor href, data-* value and onclick handler on the page.
+
+    One execute_script call replaces a WebDriver round-trip per element; if
+    it fails, a single page_source snapshot is parsed locally instead.
+    """
+    from selenium.common.exceptions import WebDriverException
+    started = time.monotonic()
+    try:
+        result = driver.execute_script(HARVEST_JS)
+        source = "script"
+    except WebDriverException as e:
+        print(f"Harvest script failed ({e.__class__.__name__}), parsing page source instead")
+        result = parse_page_source(driver.page_source, driver.current_url)
+        source = "page_source"
+
+    print(f"Harvested {len(result['hrefs'])} hrefs and {len(result['data'])} data attributes "
+          f"via {source} in {time.monotonic() - started:.2f}s")
+    return result
+
+
+def selected_os_labels(driver):
+    """Text shown on the OS dropdown(s); empty if it can't be read"""
+    from selenium.common.exceptions import WebDriverException
+    try:
+        return driver.execute_script(SELECTED_OS_JS) or []
+    except WebDriverException:
+        return []
+
+
+def is_bin_reference(value):
+    return bool(value) and '.bin' in value.lower()
+
+
+def find_free_port():
+    """Ask the OS for an unused local TCP port (one per Chrome instance)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def enable_performance_log(chrome_options):
+    """Ask chromedriver to record CDP network events for resource_report()"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def block_resources(driver, patterns=None):
+    """Block images, fonts, media and third-party trackers at the network layer"""
+    from selenium.common.exceptions import WebDriverException
+    patterns = BLOCKED_URL_PATTERNS if patterns is None else patterns
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except (WebDriverException, AttributeError) as e:
+        print(f"Resource blocking unavailable: {e}")
+        return False
+    print(f"Blocking {len(patterns)} resource patterns (images, fonts, media, trackers)")
+    return True
+
+
+def resource_report(driver, label):
+    """Summarise network activity since the last report from the performance log.
+
+    Prints requests made, bytes transferred and requests blocked by type.
+    Returns (requests, bytes, blocked) or None if no log is available.
+    """
+    from selenium.common.exceptions import WebDriverException
+    try:
+        entries = driver.get_log("performance")
+    except (WebDriverException, AttributeError, ValueError):
+        return None
+
+    types = {}
+    blocked = {}
+    requests_made = 0
+    transferred = 0
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            requests_made += 1
+            types[params.get("requestId")] = params.get("type", "Other")
+        elif method == "Network.loadingFinished":
+            transferred += params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            kind = types.get(params.get("requestId"), params.get("type", "Other"))
+            blocked[kind] = blocked.get(kind, 0) + 1
+
+    blocked_total = sum(blocked.values())
+    detail = ", ".join(f"{kind} {count}" for kind, count in sorted(blocked.items()))
+    print(f"Network for {label}: {requests_made} requests, {transferred / 1048576:.1f} MB transferred, "
+          f"{blocked_total} blocked" + (f" ({detail})" if detail else ""))
+    return requests_made, transferred, blocked_total
+
+
+try:
+    import fcntl
+except ImportError:  # Windows: profile slots are used without locking
+    fcntl = None
+
+DEFAULT_CACHE_SIZE_MB = 256
+# Profile subdirectories that are pure cache and safe to delete when over the cap
+PROFILE_CACHE_DIRS = ["Cache", os.path.join("Default", "Cache"), os.path.join("Default", "Code Cache"),
+                      os.path.join("Default", "Service Worker", "CacheStorage"), "GrShaderCache", "ShaderCache"]
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class BrowserProfile:
+    """Persistent Chrome profile and HTTP disk cache reused across runs.
+
+    Chrome refuses to share a user-data-dir between processes, so the base
+    directory holds numbered slots and each browser locks the first free
+    one. Concurrent workers and concurrent jobs on the same agent each get
+    their own warm slot. Slots over `cache_size_mb` have their cache
+    directories cleared before use.
+    """
+
+    def __init__(self, base_dir, cache_size_mb=DEFAULT_CACHE_SIZE_MB):
+        self.base_dir = base_dir
+        self.cache_size = cache_size_mb * 1024 * 1024
+        self.path = None
+        self.warm = False
+        self._lock_file = None
+
+    def acquire(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        slot = 0
+        while True:
+            path = os.path.join(self.base_dir, f"slot-{slot}")
+            os.makedirs(path, exist_ok=True)
+            lock_file = open(os.path.join(self.base_dir, f"slot-{slot}.lock"), "w")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                lock_file.close()
+                slot += 1
+
+        self._lock_file = lock_file
+        self.path = path
+        self._trim()
+        self.warm = os.path.isdir(os.path.join(path, "Default"))
+        print(f"Using {'warm' if self.warm else 'cold'} browser profile {path}")
+        return path
+
+    def _trim(self):
+        size = _dir_size(self.path)
+        if size <= self.cache_size:
+            return
+        for name in PROFILE_CACHE_DIRS:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        print(f"Browser profile was {size / 1048576:.0f} MB, cleared its caches "
+              f"(now {_dir_size(self.path) / 1048576:.0f} MB)")
+
+    def chrome_arguments(self):
+        return [f"--user-data-dir={os.path.abspath(self.path)}",
+                f"--disk-cache-dir={os.path.abspath(os.path.join(self.path, 'Cache'))}",
+                f"--disk-cache-size={self.cache_size}"]
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def profile_from_options(options):
+    """A BrowserProfile for --profile-dir, or None for a throwaway profile"""
+    if not options.profile_dir:
+        return None
+    return BrowserProfile(options.profile_dir, options.cache_size)
+
+
+def report_startup(profile, startup, first_load):
+    """Print startup and first page load times next to earlier warm/cold runs"""
+    state = "no profile" if profile is None else ("warm" if profile.warm else "cold")
+    print(f"Browser startup {startup:.1f}s, first page load {first_load:.1f}s ({state})")
+    if profile is None:
+        return
+
+    history_path = os.path.join(profile.base_dir, "startup_timings.json")
+    try:
+        with open(history_path, encoding="utf-8") as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        history = []
+
+    for warm in (True, False):
+        runs = [run for run in history if run["warm"] == warm]
+        if runs:
+            print(f"  Earlier {'warm' if warm else 'cold'} runs ({len(runs)}): "
+                  f"startup {sum(run['startup'] for run in runs) / len(runs):.1f}s, "
+                  f"first load {sum(run['first_load'] for run in runs) / len(runs):.1f}s")
+
+    history.append({"time": time.time(), "warm": profile.warm, "startup": startup, "first_load": first_load})
+    # One temp file per slot so concurrent browsers don't clobber each other's write
+    tmp_path = f"{history_path}.{os.path.basename(profile.path)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history[-50:], f, indent=2)
+    os.replace(tmp_path, history_path)
+
+
+DEFAULT_SELECTOR_CACHE = os.path.join("downloads", ".selector_cache.json")
+
+# Ways of clicking an element, tried in the order SelectorCache.order() gives
+CLICK_METHODS = ["regular", "javascript", "action-chains", "javascript-event"]
+
+
+def click_with(driver, element, method):
+    """Click element using one of CLICK_METHODS; raises if the click fails"""
+    if method == "regular":
+        element.click()
+    elif method == "javascript":
+        driver.execute_script("arguments[0].click();", element)
+    elif method == "action-chains":
+        from selenium.webdriver.common.action_chains import ActionChains
+        ActionChains(driver).move_to_element(element).click().perform()
+    elif method == "javascript-event":
+        driver.execute_script("arguments[0].click(); arguments[0].dispatchEvent(new Event('change')); "
+                              "arguments[0].dispatchEvent(new Event('input'));", element)
+    else:
+        raise ValueError(f"Unknown click method: {method}")
+
+
+def click_element(driver, element, methods):
+    """Try click methods in order. Returns the one that worked, or None."""
+    for method in methods:
+        try:
+            click_with(driver, element, method)
+            print(f"{method} click successful")
+            return method
+        except Exception as e:
+            print(f"{method} click failed: {e}")
+    return None
+
+
+class SelectorCache:
+    """Remembers which selector and click method worked for each selection step.
+
+    `order()` puts the candidate that succeeded last first and sorts the
+    rest by success rate, so on unchanged markup a step costs one attempt.
+    Selectors that embed an OS code are stored as templates with `{code}`
+    so what is learned for one OS carries over to the others.
+    """
+
+    def __init__(self, path=DEFAULT_SELECTOR_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def order(self, step, candidates, key=str):
+        with self._lock:
+            stats = dict(self.data.get(step, {}))
+        last = max(stats, key=lambda name: stats[name].get("last_success", 0), default=None)
+        if last is not None and not stats[last].get("last_success"):
+            last = None
+
+        def rank(indexed):
+            index, candidate = indexed
+            entry = stats.get(key(candidate), {})
+            successes = entry.get("success", 0)
+            attempts = successes + entry.get("failure", 0)
+            # Laplace-smoothed success rate; untried candidates keep their original order
+            return (key(candidate) != last, -(successes + 1) / (attempts + 2), index)
+
+        ordered = [candidate for _, candidate in sorted(enumerate(candidates), key=rank)]
+        if last is not None and ordered and key(ordered[0]) == last:
+            print(f"Selector cache: trying {step} '{last}' first")
+        return ordered
+
+    def record(self, step, name, ok):
+        with self._lock:
+            entry = self.data.setdefault(step, {}).setdefault(name, {"success": 0, "failure": 0})
+            entry["success" if ok else "failure"] += 1
+            if ok:
+                entry["last_success"] = time.time()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def open_os_dropdown(driver, readiness, selectors):
+    """Click the first usable OS dropdown, trying the cached selector first"""
+    from selenium.webdriver.common.by import By
+    for selector in selectors.order("dropdown", DROPDOWN_SELECTORS):
+        try:
+            dropdowns = driver.find_elements(By.CSS_SELECTOR, selector)
+            print(f"Found {len(dropdowns)} elements with selector: {selector}")
+
+            for dropdown in dropdowns:
+                if dropdown.is_displayed() and dropdown.is_enabled():
+                    print(f"Clicking dropdown with selector: {selector}")
+
+                    # Scroll into view
+                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", dropdown)
+
+                    # Try to click
+                    try:
+                        dropdown.click()
+                    except Exception:
+                        driver.execute_script("arguments[0].click();", dropdown)
+
+                    selectors.record("dropdown", selector, readiness.wait_for_listbox(legacy_sleep=4))
+                    return True
+
+            selectors.record("dropdown", selector, False)
+
+        except Exception as e:
+            print(f"Error with selector {selector}: {e}")
+            selectors.record("dropdown", selector, False)
+            continue
+
+    return False
+
+
+def selector_cache_from_options(options):
+    return SelectorCache(None if options.no_selector_cache else options.selector_cache)
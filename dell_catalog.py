@@ -0,0 +1,140 @@
+"""Browserless discovery of Dell driver listings over plain HTTP.
+
+The drivers page of dell.com fills its table from a JSON endpoint. Asking
+that endpoint directly returns the same .bin links in milliseconds and
+without a Chromium process. `api_base` can point at any stand-in server
+that serves the same path, which keeps this usable offline.
+"""
+import os
+from urllib.parse import urlparse
+
+import requests
+
+from dell_downloader import USER_AGENT
+
+DELL_API_BASE = "https://www.dell.com"
+DRIVER_LIST_PATH = "/support/driver/{locale}/ips/api/driverlist/fetchdriversbyproduct"
+DEFAULT_LOCALE = "ko-kr"
+DEFAULT_LOB = "PowerEdge"
+
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "application/json, text/plain, */*",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+# Keys carried from an enclosing driver record onto each file entry
+DRIVER_FIELDS = {
+    "drivername": "driver_name",
+    "dellver": "version",
+    "releasedate": "release_date",
+    "driverid": "driver_id",
+}
+
+
+def driver_list_url(api_base=DELL_API_BASE, locale=DEFAULT_LOCALE):
+    return api_base.rstrip("/") + DRIVER_LIST_PATH.format(locale=locale)
+
+
+def fetch_driver_list(product_code, os_code, api_base=DELL_API_BASE, locale=DEFAULT_LOCALE,
+                      lob=DEFAULT_LOB, session=None, timeout=15):
+    """Fetch the raw JSON listing for one product/OS pair"""
+    params = {"productcode": product_code, "oscode": os_code, "lob": lob}
+    response = (session or requests).get(driver_list_url(api_base, locale), params=params,
+                                         headers=DEFAULT_HEADERS, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def _is_bin_url(value):
+    return (isinstance(value, str) and value.lower().startswith(("http://", "https://"))
+            and urlparse(value).path.lower().endswith(".bin"))
+
+
+def _file_entry(record, url, context):
+    entry = dict(context)
+    entry["url"] = url
+    entry["name"] = os.path.basename(urlparse(url).path)
+    for key, value in record.items():
+        lowered = key.lower()
+        if lowered == "filename" and isinstance(value, str) and value:
+            entry["name"] = value
+        elif lowered == "filesize":
+            try:
+                entry["size"] = int(value)
+            except (TypeError, ValueError):
+                pass
+        elif lowered in ("md5", "md5hash") and value:
+            entry["md5"] = str(value).lower()
+        elif lowered in ("sha256", "sha256hash") and value:
+            entry["sha256"] = str(value).lower()
+    return entry
+
+
+def parse_driver_list(data):
+    """Return one entry dict per .bin file found anywhere in the listing"""
+    entries = []
+    seen = set()
+
+    def walk(node, context):
+        if isinstance(node, list):
+            for item in node:
+                walk(item, context)
+            return
+        if not isinstance(node, dict):
+            return
+
+        context = dict(context)
+        for key, value in node.items():
+            field = DRIVER_FIELDS.get(key.lower())
+            if field and isinstance(value, (str, int)) and value != "":
+                context[field] = value
+
+        for value in node.values():
+            if _is_bin_url(value) and value not in seen:
+                seen.add(value)
+                entries.append(_file_entry(node, value, context))
+            elif isinstance(value, (dict, list)):
+                walk(value, context)
+
+    walk(data, {})
+    return entries
+
+
+def fetch_bin_entries(product_code, os_code, api_base=DELL_API_BASE, locale=DEFAULT_LOCALE,
+                      lob=DEFAULT_LOB, session=None, timeout=15, recorder=None):
+    """Discover .bin files without a browser. Returns [] if the fetch fails.
+
+    `recorder` (a dell_replay.PageRecorder) keeps the raw listing so
+    `dell_replay.py serve` can answer for it offline.
+    """
+    try:
+        data = fetch_driver_list(product_code, os_code, api_base, locale, lob, session, timeout)
+    except (requests.RequestException, ValueError) as e:
+        print(f"Catalog fetch failed for {product_code}/{os_code}: {e}")
+        return []
+    if recorder is not None:
+        recorder.save_listing(product_code, os_code, data)
+
+    entries = parse_driver_list(data)
+    print(f"Catalog: Found {len(entries)} .bin files for {product_code}/{os_code}")
+    return entries
+
+
+def fetch_bin_urls(product_code, os_code, **kwargs):
+    return [entry["url"] for entry in fetch_bin_entries(product_code, os_code, **kwargs)]
+
+
+def driver_names(entries):
+    """Map each entry's URL to the driver name the listing gives it, where it has one"""
+    return {entry["url"]: str(entry["driver_name"]) for entry in entries if entry.get("driver_name")}
+
+
+def published_checksums(entries):
+    """Map each entry's URL to the checksums Dell published for it"""
+    checksums = {}
+    for entry in entries:
+        published = {name: entry[name] for name in ("sha256", "md5") if entry.get(name)}
+        if published:
+            checksums[entry["url"]] = published
+    return checksums
@@ -0,0 +1,234 @@
+"""Command-line entry point for discovering, downloading and checking BIN files.
+
+    python3 dell_cli.py discover --discovery http     # scrape, save downloads/catalog.json
+    python3 dell_cli.py download --from-catalog       # download what the last discovery found
+    python3 dell_cli.py list --os ubuntu --files
+    python3 dell_cli.py verify R440_BIOS_2.19.1.BIN
+    python3 dell_cli.py status
+
+discover and download take the all-OS downloader's options and are the
+only commands that load requests, Selenium or a browser. list, verify and
+status answer from the saved catalog and manifest with the standard
+library alone, so they return almost immediately.
+"""
+import argparse, hashlib, json, os, sys, time
+from urllib.parse import urlparse
+
+from dell_fleet import DEFAULT_SAVED_CATALOG, load_catalog
+from dell_metrics import DEFAULT_METRICS_JSON
+from dell_retention import newest_releases
+from dell_store import DEFAULT_MANIFEST_PATH, Manifest
+
+# Commands whose extra arguments go to the all-OS downloader
+DOWNLOADER_COMMANDS = {
+    "discover": ["--discover-only"],
+    "download": [],
+}
+
+
+def run_downloader(forced, extra):
+    # Deferred: importing the downloader pulls in requests, and Selenium once a browser starts
+    import dell_driver_r440_all_os_downloader as all_os
+    all_os.main(all_os.parse_args(forced + extra))
+    return 0
+
+
+def _age(timestamp):
+    seconds = max(time.time() - timestamp, 0)
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.0f}{unit} ago"
+    return f"{seconds:.0f}s ago"
+
+
+def _label(entry):
+    return f"{entry['model']} / {entry['os_name']}" if entry.get("model") else entry["os_name"]
+
+
+def local_files(entry, keep=None):
+    """(url, local path) for each file of a catalog entry, named as build_os_jobs() names them.
+
+    With `keep`, releases older than the `keep` newest per component are left out.
+    """
+    files = []
+    for j, item in enumerate(entry["files"]):
+        filename = os.path.basename(urlparse(item["url"]).path)
+        if not filename or '.' not in filename:
+            filename = f"driver_{j}.bin"
+        files.append((item, os.path.join(entry["directory"], filename)))
+    if keep:
+        drivers = {os.path.basename(path): item["driver"] for item, path in files if item.get("driver")}
+        superseded = set(newest_releases([os.path.basename(path) for _, path in files], keep, drivers))
+        files = [(item, path) for item, path in files if os.path.basename(path) not in superseded]
+    return files
+
+
+def _open_catalog(args):
+    try:
+        return load_catalog(args.catalog)
+    except (OSError, ValueError) as e:
+        print(f"No saved catalog at {args.catalog} ({e}); run 'dell_cli.py discover' first")
+        return None
+
+
+def _selected(catalog, os_filter):
+    entries = list(catalog["targets"].values())
+    if os_filter:
+        wanted = os_filter.lower()
+        entries = [entry for entry in entries
+                   if wanted in _label(entry).lower() or wanted in entry["os_code"].lower()]
+    return entries
+
+
+def cmd_list(args):
+    catalog = _open_catalog(args)
+    if catalog is None:
+        return 1
+    entries = _selected(catalog, args.os)
+
+    if args.json:
+        rows = [{"target": _label(entry), "product": entry["product"], "os_code": entry["os_code"],
+                 "files": [{"url": item["url"], "path": path, "local": os.path.exists(path)}
+                           for item, path in local_files(entry)]}
+                for entry in entries]
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"Catalog {args.catalog}, saved {_age(catalog.get('saved', 0))}")
+    for entry in entries:
+        files = local_files(entry)
+        wanted = {path for _, path in local_files(entry, args.keep_versions)}
+        present = sum(1 for _, path in files if os.path.exists(path))
+        print(f"{_label(entry)} [{entry['os_code']}]: {len(files)} files, {present} local, "
+              f"{len(files) - len(wanted)} superseded, discovered {_age(entry['discovered'])}")
+        if args.files:
+            for item, path in files:
+                if os.path.exists(path):
+                    state = "local"
+                else:
+                    state = "missing" if path in wanted else "superseded"
+                print(f"  {state:<10} {os.path.basename(path)}")
+    return 0
+
+
+def _digest(path, name):
+    digest = hashlib.new(name)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _matches(path, names):
+    return not names or any(os.path.normpath(path) == os.path.normpath(name) or os.path.basename(path) == name
+                            for name in names)
+
+
+def cmd_verify(args):
+    """Check local files against Dell's published checksums, else the hash recorded at download"""
+    catalog = _open_catalog(args)
+    if catalog is None:
+        return 1
+    manifest = Manifest(args.manifest)
+    counts = {"ok": 0, "mismatch": 0, "missing": 0, "unverified": 0}
+
+    for entry in _selected(catalog, args.os):
+        for item, path in local_files(entry, args.keep_versions):
+            if not _matches(path, args.files):
+                continue
+            recorded = manifest.get(item["url"])
+            if not os.path.exists(path):
+                status = "missing"
+            elif args.quick:
+                size = recorded.get("size")
+                status = "unverified" if size is None else ("ok" if os.path.getsize(path) == size else "mismatch")
+            else:
+                expected = dict(item.get("published") or {})
+                if not expected and recorded.get("sha256"):
+                    expected = {"sha256": recorded["sha256"]}
+                name = "sha256" if "sha256" in expected else ("md5" if "md5" in expected else None)
+                if name is None:
+                    status = "unverified"
+                else:
+                    status = "ok" if _digest(path, name) == expected[name].lower() else "mismatch"
+            counts[status] += 1
+            if status != "ok" or args.verbose:
+                print(f"{status.upper():<10} {path}")
+
+    print(f"Verified: {counts['ok']} ok, {counts['mismatch']} mismatched, {counts['missing']} missing, "
+          f"{counts['unverified']} without a reference checksum")
+    return 1 if counts["mismatch"] or counts["missing"] else 0
+
+
+def cmd_status(args):
+    catalog = _open_catalog(args)
+    if catalog is None:
+        return 1
+    entries = list(catalog["targets"].values())
+    files = [path for entry in entries for _, path in local_files(entry, args.keep_versions)]
+    urls = {item["url"] for entry in entries for item in entry["files"]}
+    present = [path for path in files if os.path.exists(path)]
+    print(f"Catalog:   {args.catalog}, saved {_age(catalog.get('saved', 0))}")
+    print(f"Targets:   {len(entries)} product/OS pairs, {len(files)} current files ({len(urls)} unique URLs listed)")
+    print(f"Local:     {len(present)} present, {len(files) - len(present)} missing")
+
+    manifest = Manifest(args.manifest)
+    print(f"Manifest:  {len(manifest.data['files'])} URLs recorded, updated {manifest.data.get('updated', 'never')}")
+
+    try:
+        with open(args.metrics, encoding="utf-8") as f:
+            run = json.load(f).get("run", {})
+    except (OSError, ValueError):
+        run = {}
+    if run:
+        print(f"Last run:  finished {_age(run['finished'])}, {run['files_requested']} requested, "
+              f"{run['files_failed']} failed, {run['bytes_total'] / 1048576:.1f} MB "
+              f"in {run['makespan_seconds']:.1f}s")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Discover, download and check Dell .bin drivers")
+    parser.add_argument("--catalog", default=DEFAULT_SAVED_CATALOG,
+                        help=f"saved catalog to read (default: {DEFAULT_SAVED_CATALOG})")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH,
+                        help=f"download manifest to read (default: {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument("--metrics", default=DEFAULT_METRICS_JSON,
+                        help=f"metrics of the last run (default: {DEFAULT_METRICS_JSON})")
+    parser.add_argument("--keep-versions", type=int, default=1,
+                        help="newest releases per component expected locally, 0 for every listed file "
+                             "(match the downloader's --keep-versions; default: 1)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("discover", help="scrape the drivers listing and save the catalog; "
+                                         "other arguments go to the all-OS downloader")
+    commands.add_parser("download", help="discover and download, or --from-catalog to skip discovery; "
+                                         "other arguments go to the all-OS downloader")
+
+    listing = commands.add_parser("list", help="show what the saved catalog holds")
+    listing.add_argument("--os", default=None, help="only targets whose name or OS code contains this")
+    listing.add_argument("--files", action="store_true", help="list every file and whether it is local")
+    listing.add_argument("--json", action="store_true", help="print JSON instead of text")
+
+    verify = commands.add_parser("verify", help="check downloaded files against their checksums")
+    verify.add_argument("files", nargs="*", help="file names or paths to check (default: every file)")
+    verify.add_argument("--os", default=None, help="only targets whose name or OS code contains this")
+    verify.add_argument("--quick", action="store_true", help="compare sizes only, without hashing")
+    verify.add_argument("--verbose", action="store_true", help="also print files that verified")
+
+    commands.add_parser("status", help="summarise the saved catalog, local files and the last run")
+
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in DOWNLOADER_COMMANDS:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args, [arg for arg in extra if arg != "--"]
+
+
+def main(argv=None):
+    args, extra = parse_args(argv)
+    if args.command in DOWNLOADER_COMMANDS:
+        return run_downloader(DOWNLOADER_COMMANDS[args.command], extra)
+    return {"list": cmd_list, "verify": cmd_verify, "status": cmd_status}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
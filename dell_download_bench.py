@@ -0,0 +1,309 @@
+"""Benchmark the download engine against a local HTTP server.
+
+A server process serves synthetic .BIN files of any size with Range
+support and can add latency, throttle, drop each connection once part way
+through, or leave out Content-Length. Every scenario (network profile x
+chunk size x concurrency x file mix) runs in its own process so CPU time
+and peak RSS belong to that scenario alone.
+
+    python3 dell_download_bench.py
+    python3 dell_download_bench.py --profiles clean,flaky --chunks adaptive,64K,1M \\
+        --concurrency 1,4,8 --mixes small,large --json bench.json
+
+Mixes are COUNTxSIZE terms joined by '+', e.g. 'mine=2x256M+100x64K'.
+"""
+import argparse, json, multiprocessing, os, shutil, socket, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+from dell_ratelimit import parse_rate
+
+# Network conditions; see parse_profile() for the keys
+PROFILES = {
+    "clean": "",
+    "latency": "latency=0.1",
+    "throttled": "rate=20M",
+    "flaky": "drop=0.5",
+    "no-length": "no-length",
+}
+
+MIXES = {
+    "small": "200x64K",
+    "medium": "16x8M",
+    "large": "2x256M",
+    "huge": "1x1G",
+    "mixed": "1x128M+8x4M+100x64K",
+}
+
+DEFAULT_PROFILES = "clean,flaky,no-length"
+DEFAULT_CHUNKS = "adaptive,64K,1M"
+DEFAULT_CONCURRENCY = "1,4"
+DEFAULT_MIXES = "small,medium,mixed"
+
+BLOCK_SIZE = 1024 * 1024
+WRITE_SIZE = 64 * 1024
+
+
+def parse_profile(spec):
+    """'latency=0.05,rate=10M,drop=0.5,no-length' -> dict"""
+    profile = {"latency": 0.0, "rate": None, "drop": None, "no_length": False}
+    for item in filter(None, (part.strip() for part in PROFILES.get(spec, spec).split(","))):
+        key, _, value = item.partition("=")
+        if key == "latency":
+            profile["latency"] = float(value)
+        elif key == "rate":
+            profile["rate"] = parse_rate(value)
+        elif key == "drop":
+            profile["drop"] = float(value)
+        elif key == "no-length":
+            profile["no_length"] = True
+        else:
+            raise ValueError(f"Unknown profile setting: {item}")
+    return profile
+
+
+def parse_mix(spec):
+    """'2x256M+100x64K' (optionally 'name=...') -> [256 MiB, 256 MiB, 64 KiB, ...]"""
+    _, _, terms = spec.rpartition("=")
+    sizes = []
+    for term in MIXES.get(terms, terms).split("+"):
+        count, _, size = term.strip().partition("x")
+        sizes.extend([int(parse_rate(size))] * int(count))
+    return sizes
+
+
+class SyntheticHandler(BaseHTTPRequestHandler):
+    """Serves /<scenario>/<index>-<size>.BIN filled with a repeating random block"""
+
+    protocol_version = "HTTP/1.1"
+    block = os.urandom(BLOCK_SIZE)
+    profile = parse_profile("clean")
+    dropped = set()
+    dropped_lock = threading.Lock()
+
+    def _size(self):
+        name = os.path.basename(urlparse(self.path).path)
+        try:
+            return int(name.split("-", 1)[1].split(".", 1)[0])
+        except (IndexError, ValueError):
+            return None
+
+    def _headers(self, size):
+        time.sleep(self.profile["latency"])
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            start = int(range_header[6:].split("-", 1)[0])
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        if self.profile["no_length"]:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        else:
+            self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        return start, end
+
+    def do_HEAD(self):
+        size = self._size()
+        if size is None:
+            self.send_error(404)
+            return
+        self._headers(size)
+
+    def do_GET(self):
+        size = self._size()
+        if size is None:
+            self.send_error(404)
+            return
+        span = self._headers(size)
+        if span is None:
+            return
+        start, end = span
+
+        # Cut each file's first full transfer short once, to exercise resume; the path
+        # carries the scenario, so every scenario on this server gets its own drops
+        stop_at = end + 1
+        if self.profile["drop"] is not None and start == 0:
+            with self.dropped_lock:
+                if self.path not in self.dropped:
+                    self.dropped.add(self.path)
+                    stop_at = int(size * self.profile["drop"])
+
+        rate = self.profile["rate"]
+        started = time.monotonic()
+        sent = 0
+        position = start
+        try:
+            while position < stop_at:
+                offset = position % BLOCK_SIZE
+                length = min(WRITE_SIZE, BLOCK_SIZE - offset, stop_at - position)
+                self.wfile.write(self.block[offset:offset + length])
+                position += length
+                sent += length
+                if rate:
+                    ahead = sent / rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        if stop_at <= end:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(profile_spec, port_pipe):
+    SyntheticHandler.profile = parse_profile(profile_spec)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SyntheticHandler)
+    httpd.daemon_threads = True
+    port_pipe.send(httpd.server_address[1])
+    httpd.serve_forever()
+
+
+def start_server(profile_spec):
+    """Start the synthetic server in its own process; returns (process, base_url)"""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve, args=(profile_spec, sender), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{receiver.recv()}"
+
+
+def _run_scenario(base_url, sizes, chunk, workers, results):
+    import dell_downloader
+    from dell_downloader import DownloadJob, DownloadScheduler, HttpTransport
+
+    if chunk != "adaptive":
+        # Pin the read size by collapsing the adaptive range to one value
+        dell_downloader.MIN_CHUNK_SIZE = dell_downloader.MAX_CHUNK_SIZE = int(parse_rate(chunk))
+
+    target_dir = tempfile.mkdtemp(prefix="dell-bench-")
+    transport = HttpTransport(pool_size=workers * 2)
+    jobs = [DownloadJob(f"{base_url}/{i}-{size}.BIN", os.path.join(target_dir, f"{i}-{size}.BIN"))
+            for i, size in enumerate(sizes)]
+    scheduler = DownloadScheduler(workers=workers, per_host=workers, transport=transport, probe=False,
+                                  policy="discovery")
+
+    cpu_started = os.times()
+    started = time.monotonic()
+    try:
+        scheduler.run(jobs)
+    finally:
+        elapsed = time.monotonic() - started
+        cpu = os.times()
+        transport.close()
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    peak_rss = None
+    if resource is not None:
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss *= 1 if sys.platform == "darwin" else 1024
+    results.put({
+        "seconds": elapsed,
+        "bytes": sum(sizes),
+        "files_ok": sum(1 for job in jobs if job.ok),
+        "cpu_seconds": (cpu.user - cpu_started.user) + (cpu.system - cpu_started.system),
+        "peak_rss": peak_rss,
+    })
+
+
+def run_scenario(base_url, sizes, chunk, workers):
+    """Download one file mix in a fresh process and return its measurements.
+
+    `base_url` should be unique per scenario (see run_suite()) so the
+    server's drop-once state is not shared between scenarios.
+    """
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_scenario, args=(base_url, sizes, chunk, workers, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def run_suite(profiles, chunks, concurrency, mixes):
+    rows = []
+    for profile in profiles:
+        server, base_url = start_server(profile)
+        try:
+            for mix in mixes:
+                sizes = parse_mix(mix)
+                for chunk in chunks:
+                    for workers in concurrency:
+                        print(f"\n--- profile {profile}, mix {mix} ({len(sizes)} files, "
+                              f"{sum(sizes) / 1048576:.1f} MB), chunk {chunk}, {workers} workers ---")
+                        result = run_scenario(f"{base_url}/s{len(rows)}", sizes, chunk, workers)
+                        result.update({"profile": profile, "mix": mix.split("=", 1)[0], "chunk": chunk, "workers": workers})
+                        rows.append(result)
+        finally:
+            server.terminate()
+            server.join()
+    return rows
+
+
+def report(rows):
+    print(f"\n{'='*100}\nDOWNLOAD BENCHMARK\n{'='*100}")
+    print(f"{'profile':<10} {'mix':<8} {'chunk':<9} {'workers':>7} {'files':>7} {'MB':>9} "
+          f"{'seconds':>8} {'MB/s':>8} {'CPU s':>7} {'CPU s/GB':>9} {'peak RSS MB':>12}")
+    for row in rows:
+        megabytes = row["bytes"] / 1048576
+        rss = f"{row['peak_rss'] / 1048576:.1f}" if row["peak_rss"] is not None else "-"
+        print(f"{row['profile']:<10} {row['mix']:<8} {row['chunk']:<9} {row['workers']:>7} "
+              f"{row['files_ok']:>7} {megabytes:>9.1f} {row['seconds']:>8.2f} "
+              f"{megabytes / row['seconds'] if row['seconds'] else 0:>8.1f} {row['cpu_seconds']:>7.2f} "
+              f"{row['cpu_seconds'] / (megabytes / 1024) if megabytes else 0:>9.2f} {rss:>12}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the download engine against a local server")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES,
+                        help=f"network profiles: {', '.join(PROFILES)} or settings like "
+                             f"'latency=0.05,rate=10M,drop=0.5,no-length', separated by ';' when "
+                             f"they contain commas (default: {DEFAULT_PROFILES})")
+    parser.add_argument("--chunks", default=DEFAULT_CHUNKS,
+                        help=f"read sizes, 'adaptive' for the default policy (default: {DEFAULT_CHUNKS})")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help=f"download worker counts (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--mixes", default=DEFAULT_MIXES,
+                        help=f"file mixes: {', '.join(MIXES)} or COUNTxSIZE+... (default: {DEFAULT_MIXES})")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def _split(value, separator=","):
+    return [item.strip() for item in value.split(separator) if item.strip()]
+
+
+def main(options=None):
+    if options is None:
+        options = parse_args([])
+    profiles = _split(options.profiles, ";" if ";" in options.profiles else ",")
+    rows = run_suite(profiles, _split(options.chunks), [int(n) for n in _split(options.concurrency)],
+                     _split(options.mixes))
+    report(rows)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results written to {options.json}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,835 @@
+"""Download helpers shared by the Dell driver downloader scripts"""
+import hashlib, os, re, shutil, time, threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+from dell_metrics import (DownloadMetrics, ThroughputMeter, DEFAULT_METRICS_JSON,
+                          DEFAULT_METRICS_PROM)
+from dell_ratelimit import add_limiter_arguments, limiter_from_options
+from dell_retry import RetryPolicy, add_retry_arguments, retry_policy_from_options
+from dell_store import BlobStore, Manifest, DEFAULT_STORE_DIR, DEFAULT_MANIFEST_PATH
+
+# Same user agent that setup_driver() gives Chrome, so downloads look like the browser session
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+ORDER_POLICIES = ("largest-first", "shortest-first", "discovery")
+
+# Suffix for in-progress downloads; renamed to the final name once complete
+PART_SUFFIX = ".part"
+# Sidecar holding the number of valid bytes in a preallocated .part file
+ALLOC_SUFFIX = ".alloc"
+# Sidecar holding the ETag or Last-Modified of the response a .part file was started from
+VALIDATOR_SUFFIX = ".validator"
+
+# Read sizes adapt between these bounds to keep each read near CHUNK_TARGET seconds
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNK_TARGET = 0.25
+# How often (seconds) a preallocated download records its valid length
+CHECKPOINT_INTERVAL = 1.0
+# Free space kept in reserve by the disk preflight
+DISK_RESERVE = 64 * 1024 * 1024
+
+
+class InsufficientDiskSpace(OSError):
+    """The planned downloads don't fit on the target filesystem"""
+
+
+class HttpTransport:
+    """One pooled keep-alive requests.Session shared by every download in a run"""
+
+    def __init__(self, pool_size=16, user_agent=USER_AGENT):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": user_agent,
+            "Connection": "keep-alive",
+        })
+
+    def seed_from_driver(self, driver):
+        """Copy the browser's cookies into the session"""
+        try:
+            cookies = driver.get_cookies()
+        except Exception as e:
+            print(f"Could not read browser cookies: {e}")
+            return 0
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"],
+                                     domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        print(f"Transport seeded with {len(cookies)} browser cookies")
+        return len(cookies)
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def default_transport():
+    """Process-wide transport used when callers don't pass their own"""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
+
+
+class IncompleteDownload(Exception):
+    """The stream ended before the advertised number of bytes arrived"""
+
+
+class ChecksumMismatch(Exception):
+    """The downloaded bytes don't match the checksum Dell published"""
+
+
+HASH_ALGORITHMS = ("sha256", "md5")
+
+
+def _new_hashers(part_path=None):
+    """Fresh hashers, primed with any bytes already in a .part file being resumed"""
+    hashers = {name: hashlib.new(name) for name in HASH_ALGORITHMS}
+    if part_path and os.path.exists(part_path):
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+    return hashers
+
+
+def verify_checksums(computed, expected):
+    """Compare computed digests with published ones. Returns True, or None if nothing to compare."""
+    compared = False
+    for name in HASH_ALGORITHMS:
+        if expected.get(name) and computed.get(name):
+            if expected[name].lower() != computed[name]:
+                raise ChecksumMismatch(f"{name} {computed[name]} != published {expected[name].lower()}")
+            compared = True
+    return True if compared else None
+
+
+def _parse_content_range(value):
+    """Return (start, total) from a Content-Range header; either may be None"""
+    match = re.match(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)", value or "")
+    if not match:
+        return None, None
+    start = int(match.group(1)) if match.group(1) is not None else None
+    total = int(match.group(2)) if match.group(2) != "*" else None
+    return start, total
+
+
+def _resume_offset(part_path):
+    """Valid bytes in an existing .part file.
+
+    A preallocated .part is already full-length on disk, so its size says
+    nothing; the .alloc sidecar records how much of it was really written.
+    """
+    if not os.path.exists(part_path):
+        if os.path.exists(part_path + VALIDATOR_SUFFIX):
+            os.remove(part_path + VALIDATOR_SUFFIX)
+        return 0
+    offset = os.path.getsize(part_path)
+    alloc_path = part_path + ALLOC_SUFFIX
+    if os.path.exists(alloc_path):
+        try:
+            with open(alloc_path) as f:
+                offset = min(offset, int(f.read().strip() or 0))
+        except (OSError, ValueError):
+            offset = 0
+        with open(part_path, 'r+b') as f:
+            f.truncate(offset)
+        os.remove(alloc_path)
+    return offset
+
+
+def _part_validator(part_path):
+    """If-Range value recorded when part_path was started, or None"""
+    try:
+        with open(part_path + VALIDATOR_SUFFIX, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _record_part_validator(part_path, response):
+    """Remember what a fresh .part is a copy of: a strong ETag, else Last-Modified"""
+    etag = response.headers.get("ETag")
+    # If-Range only accepts strong ETags
+    value = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+    validator_path = part_path + VALIDATOR_SUFFIX
+    if value:
+        with open(validator_path, 'w', encoding="utf-8") as f:
+            f.write(value)
+    elif os.path.exists(validator_path):
+        os.remove(validator_path)
+
+
+def _checkpoint(f, alloc_path, valid):
+    f.flush()
+    with open(alloc_path, 'w') as marker:
+        marker.write(str(valid))
+
+
+def _preallocate(f, part_path, offset, total):
+    """Reserve the rest of the file up front so the filesystem can lay it out contiguously"""
+    if not total or total <= offset or not hasattr(os, "posix_fallocate"):
+        return False
+    try:
+        _checkpoint(f, part_path + ALLOC_SUFFIX, offset)
+        os.posix_fallocate(f.fileno(), offset, total - offset)
+        return True
+    except OSError:
+        # Not supported on this filesystem; fall back to plain appends
+        os.remove(part_path + ALLOC_SUFFIX)
+        return False
+
+
+def _next_chunk_size(chunk_size, elapsed, nbytes):
+    """Grow reads on fast links, shrink them on slow ones"""
+    if nbytes < chunk_size:
+        return chunk_size
+    if elapsed < CHUNK_TARGET / 2:
+        return min(chunk_size * 2, MAX_CHUNK_SIZE)
+    if elapsed > CHUNK_TARGET * 2:
+        return max(chunk_size // 2, MIN_CHUNK_SIZE)
+    return chunk_size
+
+
+def _body_reader(response, stall_timeout=None):
+    """read(n) over a streamed response body.
+
+    read1() returns what a single socket read brings, so the bytes that
+    arrived before a dropped connection are written and resumed from
+    instead of lost with a half-filled read; urllib3 1.x lacks it and gets
+    reads small enough to lose little. With `stall_timeout` a read that
+    sees no data for that long raises ReadTimeoutError.
+    """
+    # Decode gzip etc. the way iter_content() would
+    response.raw.decode_content = True
+    if stall_timeout:
+        # urllib3 sets the socket timeout again on the next request, so pooled connections aren't affected
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        if sock is not None:
+            sock.settimeout(stall_timeout)
+    raw = response.raw
+    return getattr(raw, "read1", None) or (lambda n: raw.read(min(n, MIN_CHUNK_SIZE)))
+
+
+def _resume_stalled(url, part_path, transport, retry, info, offset):
+    """Continue a stalled body at `offset` with a Range request on another connection"""
+    print(f"  No data for {retry.hedge_after:.1f}s, continuing {os.path.basename(part_path)} "
+          f"at {offset} bytes on a second connection")
+    info["hedges"] = info.get("hedges", 0) + 1
+    headers = {"Range": f"bytes={offset}-"}
+    if_range = _part_validator(part_path)
+    if if_range:
+        headers["If-Range"] = if_range
+    response = retry.get(transport, url, info=info, stream=True, headers=headers)
+    start, _ = _parse_content_range(response.headers.get("content-range"))
+    if response.status_code != 206 or start != offset:
+        response.close()
+        raise IncompleteDownload(f"stalled at {offset} bytes and the server would not resume there")
+    return response
+
+
+def _fetch_part(url, part_path, transport, progress, validators=None, info=None, limiter=None, retry=None):
+    """Fetch url into part_path, resuming from its current size.
+
+    Returns the final size, or None if `validators` were sent and the server
+    answered 304. A resume sends If-Range with the ETag or Last-Modified the
+    .part was started from, so a changed file comes back whole (200) and
+    replaces it. Every read is paced through `limiter` when one is given.
+    The request uses `retry`'s timeouts and hedging; with hedging on, a body
+    that stalls for hedge_after seconds continues from the current offset
+    on a second connection. Raises IncompleteDownload
+    if the stream is cut short, leaving the .part file in place for the next attempt.
+    """
+    retry = retry or RetryPolicy()
+    info = {} if info is None else info
+    offset = _resume_offset(part_path)
+    if offset:
+        headers = {"Range": f"bytes={offset}-"}
+        if_range = _part_validator(part_path)
+        if if_range:
+            headers["If-Range"] = if_range
+    else:
+        # Conditional GET only makes sense for a fresh fetch, not a resume
+        headers = dict(validators or {})
+    request_started = time.monotonic()
+    response = retry.get(transport, url, info=info, stream=True, headers=headers)
+
+    try:
+        if response.status_code == 304:
+            info["status"] = "not-modified"
+            return None
+
+        if response.status_code == 416 and offset:
+            _, total = _parse_content_range(response.headers.get("content-range"))
+            if total == offset:
+                info.update({"status": "downloaded", "size": offset})
+                info.update({name: hasher.hexdigest() for name, hasher in _new_hashers(part_path).items()})
+                return offset
+            os.remove(part_path)
+            raise IncompleteDownload(f"discarded stale {PART_SUFFIX} file of {offset} bytes")
+
+        response.raise_for_status()
+
+        start, total = _parse_content_range(response.headers.get("content-range"))
+        if response.status_code == 206 and start == offset:
+            mode = 'r+b'
+            print(f"  Resuming {os.path.basename(part_path)} at {offset} bytes")
+            hashers = _new_hashers(part_path)
+        else:
+            # Server ignored the Range header, sent the wrong one, or the file changed; start over
+            if offset:
+                print(f"  Server sent the whole file, restarting {os.path.basename(part_path)}")
+            offset = 0
+            mode = 'wb'
+            _record_part_validator(part_path, response)
+            content_length = response.headers.get('content-length')
+            total = int(content_length) if content_length else None
+            hashers = _new_hashers()
+
+        downloaded = offset
+        meter = ThroughputMeter(info, request_started)
+        host = urlparse(url).netloc
+        read = _body_reader(response, retry.hedge_after)
+        # Offset of the last stall hedged; a second stall there without progress fails the attempt
+        hedged_at = None
+        chunk_size = MIN_CHUNK_SIZE
+        last_percent = -1
+        with open(part_path, mode) as f:
+            f.seek(offset)
+            preallocated = _preallocate(f, part_path, offset, total)
+            last_checkpoint = time.monotonic()
+            try:
+                while True:
+                    if limiter is not None:
+                        # Keep throttled reads small so streams don't burst and stall
+                        cap = limiter.chunk_cap(host)
+                        chunk_size = min(chunk_size, max(cap, MIN_CHUNK_SIZE)) if cap else chunk_size
+                    read_started = time.monotonic()
+                    try:
+                        data = read(chunk_size)
+                    except ReadTimeoutError:
+                        if not retry.hedge_after or hedged_at == downloaded:
+                            raise
+                        hedged_at = downloaded
+                        response.close()
+                        response = _resume_stalled(url, part_path, transport, retry, info, downloaded)
+                        read = _body_reader(response, retry.hedge_after)
+                        continue
+                    if not data:
+                        break
+                    nbytes = len(data)
+                    f.write(data)
+                    # Hash while streaming so verification never re-reads the file
+                    for hasher in hashers.values():
+                        hasher.update(data)
+                    meter.update(nbytes)
+                    downloaded += nbytes
+
+                    now = time.monotonic()
+                    chunk_size = _next_chunk_size(chunk_size, now - read_started, nbytes)
+                    if limiter is not None:
+                        limiter.throttle(host, nbytes)
+
+                    if preallocated and now - last_checkpoint >= CHECKPOINT_INTERVAL:
+                        _checkpoint(f, part_path + ALLOC_SUFFIX, downloaded)
+                        last_checkpoint = now
+                    if progress and total:
+                        percent = int(downloaded * 100 / total)
+                        if percent != last_percent:
+                            last_percent = percent
+                            print(f"\r  Progress: {percent}%", end='', flush=True)
+            finally:
+                if preallocated:
+                    # Drop the unwritten tail so the .part size is the resume offset again
+                    f.truncate(downloaded)
+                    os.remove(part_path + ALLOC_SUFFIX)
+
+        if total is not None and downloaded != total:
+            raise IncompleteDownload(f"received {downloaded} of {total} bytes")
+
+        info.update({
+            "status": "downloaded",
+            "size": downloaded,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        })
+        info.update({name: hasher.hexdigest() for name, hasher in hashers.items()})
+        return downloaded
+    finally:
+        response.close()
+
+
+def download_file(url, filepath, progress=True, transport=None, attempts=3, label=None,
+                  validators=None, info=None, expected=None, limiter=None, retry=None):
+    """Download a file with progress indication.
+
+    Data goes to `<filepath>.part` and is renamed into place only once its
+    length matches Content-Length, so `filepath` never holds a truncated
+    file. A failed attempt, or a later run, resumes the .part with Range and If-Range.
+
+    `validators` are conditional request headers (If-None-Match etc.). On a
+    304 nothing is written and info["status"] is "not-modified". `info`
+    also receives the response's size, ETag, Last-Modified, the SHA-256
+    and MD5 computed while streaming, and transfer timings (ttfb,
+    transferred, peak_bps, attempts). If `expected` holds published
+    checksums a mismatch discards the .part and counts as a failed attempt.
+    `limiter` is a shared BandwidthLimiter capping the transfer rate.
+    `retry` is a RetryPolicy (timeouts, backoff, hedging); without one,
+    `attempts` attempts are made with the default timeouts and backoff.
+    """
+    info = {} if info is None else info
+    transport = transport or default_transport()
+    retry = retry or RetryPolicy(attempts=attempts)
+    part_path = filepath + PART_SUFFIX
+    # End the progress line before the result
+    newline = "\n" if progress else ""
+
+    failures = 0
+    for attempt in range(1, retry.attempts + 1):
+        info["attempts"] = attempt
+        transferred = info.get("transferred", 0)
+        try:
+            if _fetch_part(url, part_path, transport, progress, validators, info, limiter, retry) is None:
+                print(f"  Not modified: {label or os.path.basename(filepath)}")
+                return True
+            try:
+                info["verified"] = verify_checksums(info, expected or {})
+            except ChecksumMismatch:
+                os.remove(part_path)
+                raise
+            os.replace(part_path, filepath)
+            if os.path.exists(part_path + VALIDATOR_SUFFIX):
+                os.remove(part_path + VALIDATOR_SUFFIX)
+            print(f"{newline}  Successfully downloaded: {label or os.path.basename(filepath)}")
+            return True
+        except Exception as e:
+            print(f"{newline}  Error downloading {url} (attempt {attempt}/{retry.attempts}): {e}")
+            if not retry.should_retry(e) or attempt == retry.attempts:
+                break
+            # An attempt that received data resumes at once; repeated dead attempts back off
+            failures = 0 if info.get("transferred", 0) > transferred else failures + 1
+            delay = retry.delay(failures, e)
+            if delay:
+                print(f"  Retrying {label or os.path.basename(filepath)} in {delay:.1f}s")
+                time.sleep(delay)
+
+    return False
+
+
+class DownloadJob:
+    """One URL to fetch into one local path"""
+
+    def __init__(self, url, filepath, group=None, expected=None):
+        self.url = url
+        self.filepath = filepath
+        self.group = group
+        # Checksums Dell published for this file, e.g. {"sha256": ..., "md5": ...}
+        self.expected = expected or {}
+        self.host = urlparse(url).netloc
+        self.size = None
+        self.ok = None
+        self.not_modified = False
+        self.duration = None
+        # Jobs for the same URL that reuse this job's download
+        self.followers = []
+        # Set once the fetch has finished, successfully or not
+        self.done = False
+
+    @property
+    def filename(self):
+        return os.path.basename(self.filepath)
+
+
+def probe_size(url, timeout=15, transport=None):
+    """Return Content-Length from a HEAD request, or None if unknown"""
+    transport = transport or default_transport()
+    try:
+        response = transport.head(url, allow_redirects=True, timeout=timeout)
+        response.raise_for_status()
+        return int(response.headers['content-length'])
+    except (requests.RequestException, KeyError, ValueError):
+        return None
+
+
+def probe_sizes(jobs, workers=8, transport=None):
+    """Fill in job.size for every job using parallel HEAD requests"""
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for job, size in zip(jobs, pool.map(lambda job: probe_size(job.url, transport=transport), jobs)):
+            job.size = size
+    known = sum(1 for job in jobs if job.size is not None)
+    print(f"Probed sizes for {known}/{len(jobs)} files in {time.monotonic() - started:.1f}s")
+
+
+def order_jobs(jobs, policy="largest-first"):
+    """Order jobs by size. Files of unknown size go last."""
+    if policy == "discovery":
+        return list(jobs)
+    if policy not in ORDER_POLICIES:
+        raise ValueError(f"Unknown order policy: {policy}")
+    known = [job for job in jobs if job.size is not None]
+    unknown = [job for job in jobs if job.size is None]
+    known.sort(key=lambda job: job.size, reverse=(policy == "largest-first"))
+    return known + unknown
+
+
+class DownloadScheduler:
+    """Run download jobs on a bounded worker pool with a per-host limit.
+
+    `run(jobs)` downloads a fixed list. For pipelining, `start()` the
+    workers, `submit()` batches as they are discovered and `finish()` once
+    no more will come; workers wait for work until then.
+    """
+
+    def __init__(self, workers=4, per_host=4, policy="largest-first", probe=True, transport=None,
+                 store=None, manifest=None, metrics=None, limiter=None, retry=None):
+        self.workers = max(1, workers)
+        self.transport = transport or default_transport()
+        self.store = store
+        self.manifest = manifest
+        self.metrics = metrics
+        # Shared by every worker, so caps hold across concurrent downloads
+        self.limiter = limiter
+        self.retry = retry or RetryPolicy()
+        self.per_host = max(1, per_host)
+        self.policy = policy
+        self.probe = probe
+        self._condition = threading.Condition()
+        self._pending = []
+        self._active_hosts = {}
+        self._closed = True
+        self._threads = []
+        self._jobs = []
+        self._fetch_jobs = []
+        # URL -> job fetching it, so later batches follow instead of fetching again
+        self._primaries = {}
+        self._counter = [0]
+        self._started = None
+        self.makespan = None
+
+    def _next_job(self):
+        """Take the first pending job whose host is below its limit"""
+        with self._condition:
+            while True:
+                for i, job in enumerate(self._pending):
+                    if self._active_hosts.get(job.host, 0) < self.per_host:
+                        self._active_hosts[job.host] = self._active_hosts.get(job.host, 0) + 1
+                        return self._pending.pop(i)
+                if self._closed and not self._pending:
+                    return None
+                self._condition.wait()
+
+    def _release(self, job):
+        with self._condition:
+            self._active_hosts[job.host] -= 1
+            self._condition.notify_all()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                with self._condition:
+                    self._counter[0] += 1
+                    number = self._counter[0]
+                    total = len(self._fetch_jobs)
+                size = f" ({job.size / 1048576:.1f} MB)" if job.size else ""
+                print(f"Downloading {number}/{total}: {job.filename}{size}")
+                started = time.monotonic()
+                info = {}
+                try:
+                    job.ok = self._fetch(job, info)
+                except Exception as e:
+                    # A worker that dies here leaves wait_for_pending() and finish() waiting forever
+                    print(f"  Failed {job.filename}: {e}")
+                    job.ok = self._fail(job)
+                job.duration = time.monotonic() - started
+                if self.metrics is not None:
+                    self.metrics.record(job, info, job.duration)
+            finally:
+                self._release(job)
+
+    def _fail(self, job):
+        """Mark a job and everything following it as failed"""
+        with self._condition:
+            job.done = True
+            for linked in [job] + job.followers:
+                linked.ok = False
+        return False
+
+    def _local_copy(self, job):
+        """A complete copy of job.url from an earlier run, or None"""
+        if self.store is not None:
+            return self.store.lookup(job.url)
+        return job.filepath if os.path.exists(job.filepath) else None
+
+    def _fetch(self, job, info):
+        if self.store is None:
+            return self._fetch_unlocked(job, info)
+        # Other runs sharing the store may be fetching the same URL right now
+        with self.store.url_lock(job.url, job.filename):
+            return self._fetch_unlocked(job, info)
+
+    def _fetch_unlocked(self, job, info):
+        target = self._target(job)
+
+        # Revalidate what we already have instead of fetching it again
+        validators = None
+        if self.manifest is not None and self._local_copy(job):
+            validators = self.manifest.validators(job.url) or None
+
+        # Another run may have stored it while we waited for the lock
+        shared = self.store.lookup(job.url) if self.store is not None and validators is None else None
+        if shared:
+            print(f"  Linking {job.filename} fetched by another run")
+            info["status"] = "shared"
+            ok = True
+        else:
+            ok = download_file(job.url, target, progress=False, transport=self.transport,
+                               label=job.filename, validators=validators, info=info,
+                               expected=job.expected, limiter=self.limiter, retry=self.retry)
+        with self._condition:
+            # Jobs submitted from here on link the result instead of following
+            job.done = True
+            linked_jobs = [job] + job.followers
+        if not ok:
+            for follower in job.followers:
+                follower.ok = False
+            return False
+
+        if info.get("status") == "not-modified":
+            job.not_modified = True
+            source = self._local_copy(job)
+        elif shared:
+            source = shared
+        elif self.store is not None:
+            source = self.store.add(job.url, target, digest=info.get("sha256"))
+        else:
+            source = job.filepath
+
+        if self.store is not None:
+            for linked in linked_jobs:
+                self.store.link(source, linked.filepath)
+        for linked in linked_jobs:
+            linked.ok = True
+
+        if self.manifest is not None:
+            if info.get("status") == "downloaded":
+                self.manifest.update(job.url, size=info["size"], etag=info.get("etag"),
+                                     last_modified=info.get("last_modified"),
+                                     sha256=info.get("sha256"), md5=info.get("md5"),
+                                     published=job.expected or None, verified=info.get("verified"),
+                                     fetched=time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+            elif shared:
+                stored = self.store.index.get(job.url, {})
+                self.manifest.update(job.url, size=stored.get("size"), sha256=stored.get("sha256"))
+            self.manifest.add_paths(job.url, [linked.filepath for linked in linked_jobs])
+        return True
+
+    def _target(self, job):
+        return self.store.staging_path(job.url) if self.store is not None else job.filepath
+
+    def _check_disk_space(self, jobs):
+        """Fail before the first byte if the planned downloads can't fit"""
+        needed = 0
+        for job in jobs:
+            if not job.size or self._local_copy(job):
+                continue
+            part_path = self._target(job) + PART_SUFFIX
+            already = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            needed += max(job.size - already, 0)
+        if not jobs or not needed:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self._target(jobs[0])))
+        free = shutil.disk_usage(directory).free
+        print(f"Disk preflight: {needed / 1048576:.1f} MB planned, {free / 1048576:.1f} MB free in {directory}")
+        if needed + DISK_RESERVE > free:
+            raise InsufficientDiskSpace(
+                f"Not enough disk space in {directory}: need {needed / 1048576:.1f} MB "
+                f"plus {DISK_RESERVE / 1048576:.0f} MB reserve, only {free / 1048576:.1f} MB free")
+
+    def _deduplicate(self, jobs):
+        """Collapse jobs sharing a URL and link anything the store already holds"""
+        by_url = {}
+        for job in jobs:
+            by_url.setdefault(job.url, []).append(job)
+
+        primaries = []
+        reused = 0
+        for url, group in by_url.items():
+            # URLs the manifest knows are revalidated with a conditional GET instead
+            blob = self.store.lookup(url)
+            if blob and not (self.manifest is not None and self.manifest.validators(url)):
+                for job in group:
+                    self.store.link(blob, job.filepath)
+                    job.ok = True
+                reused += 1
+                continue
+            group[0].followers = group[1:]
+            primaries.append(group[0])
+
+        print(f"Store: {len(jobs)} files map to {len(by_url)} unique URLs, "
+              f"{reused} already stored, {len(primaries)} to fetch")
+        return primaries
+
+    def _attach_known(self, jobs):
+        """Hand jobs for URLs submitted earlier to the job fetching them"""
+        fresh = []
+        finished = []
+        with self._condition:
+            for job in jobs:
+                primary = self._primaries.get(job.url)
+                if primary is None:
+                    fresh.append(job)
+                elif not primary.done:
+                    primary.followers.append(job)
+                else:
+                    finished.append((primary, job))
+
+        for primary, job in finished:
+            blob = self.store.lookup(job.url) if primary.ok else None
+            if blob:
+                self.store.link(blob, job.filepath)
+                job.ok = True
+            else:
+                # The earlier fetch failed; try again with this job
+                fresh.append(job)
+        return fresh
+
+    def start(self):
+        """Start the workers; they wait for submit() until finish() is called"""
+        self._closed = False
+        self._started = time.monotonic()
+        self._threads = [threading.Thread(target=self._worker, name=f"download-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, jobs):
+        """Queue a batch of jobs behind whatever is still pending"""
+        jobs = list(jobs)
+        if self.store is not None:
+            fresh = self._attach_known(jobs)
+            fetch_jobs = self._deduplicate(fresh) if fresh else []
+        else:
+            fetch_jobs = jobs
+
+        if self.probe and self.policy != "discovery":
+            probe_sizes(fetch_jobs, workers=self.workers * 2, transport=self.transport)
+        self._check_disk_space(fetch_jobs)
+
+        with self._condition:
+            self._jobs.extend(jobs)
+            self._fetch_jobs.extend(fetch_jobs)
+            for job in fetch_jobs:
+                self._primaries[job.url] = job
+            self._pending = order_jobs(self._pending + fetch_jobs, self.policy)
+            self._condition.notify_all()
+
+    def wait_for_pending(self):
+        """Block until every submitted job has been picked up by a worker"""
+        with self._condition:
+            while self._pending:
+                self._condition.wait()
+
+    def finish(self):
+        """Let the workers drain what is pending, then report like run()"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        makespan = time.monotonic() - self._started
+        jobs, fetch_jobs = self._jobs, self._fetch_jobs
+
+        if self.manifest is not None:
+            self.manifest.save()
+            unchanged = sum(1 for job in fetch_jobs if job.not_modified)
+            print(f"Manifest: {unchanged}/{len(fetch_jobs)} files unchanged since the last run")
+
+        if self.metrics is not None:
+            self.metrics.finish(makespan, len(jobs))
+
+        succeeded = sum(1 for job in jobs if job.ok)
+        total_bytes = sum(job.size or 0 for job in fetch_jobs if job.ok and not job.not_modified)
+        print(f"\nCompleted {succeeded}/{len(jobs)} files, requested {len(fetch_jobs)} "
+              f"({total_bytes / 1048576:.1f} MB) in a makespan of {makespan:.1f}s "
+              f"with {self.workers} workers, policy {self.policy}")
+        self.makespan = makespan
+        return jobs
+
+    def run(self, jobs):
+        """Download every job and return them with ok/duration filled in"""
+        jobs = list(jobs)
+        if not jobs:
+            return jobs
+        self.start()
+        self.submit(jobs)
+        return self.finish()
+
+
+def add_scheduler_arguments(parser):
+    """Register the download scheduler options on an argparse parser"""
+    parser.add_argument("--download-workers", type=int, default=4,
+                        help="number of concurrent downloads (default: 4)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="maximum concurrent downloads per host (default: 4)")
+    parser.add_argument("--order", choices=ORDER_POLICIES, default="largest-first",
+                        help="download ordering policy (default: largest-first)")
+    parser.add_argument("--store-dir", default=os.environ.get("DELL_BIN_STORE", DEFAULT_STORE_DIR),
+                        help="content-addressed store shared by all OS folders; point concurrent runs "
+                             "(e.g. Jenkins jobs on one agent) at one directory to fetch each file once "
+                             f"(default: $DELL_BIN_STORE or {DEFAULT_STORE_DIR})")
+    parser.add_argument("--no-store", action="store_true",
+                        help="write every file directly instead of linking from the store")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH,
+                        help=f"download manifest used for incremental sync (default: {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="don't record or revalidate downloads through the manifest")
+    parser.add_argument("--metrics-json", default=DEFAULT_METRICS_JSON,
+                        help=f"per-file and per-run download metrics as JSON (default: {DEFAULT_METRICS_JSON})")
+    parser.add_argument("--metrics-prom", default=DEFAULT_METRICS_PROM,
+                        help=f"the same metrics as a Prometheus textfile (default: {DEFAULT_METRICS_PROM})")
+    add_limiter_arguments(parser)
+    add_retry_arguments(parser)
+
+
+def scheduler_from_options(options, transport=None):
+    store = None if options.no_store else BlobStore(options.store_dir)
+    manifest = None if options.no_manifest else Manifest(options.manifest)
+    return DownloadScheduler(workers=options.download_workers, per_host=options.per_host,
+                             policy=options.order, transport=transport, store=store,
+                             manifest=manifest, metrics=DownloadMetrics(),
+                             limiter=limiter_from_options(options), retry=retry_policy_from_options(options))
+
+
+def export_metrics(scheduler, options):
+    """Write the scheduler's metrics to the JSON and Prometheus paths in options"""
+    metrics = scheduler.metrics
+    if metrics is None or not metrics.run:
+        return
+    metrics.report()
+    if options.metrics_json:
+        metrics.write_json(options.metrics_json)
+    if options.metrics_prom:
+        metrics.write_prometheus(options.metrics_prom)
+    print(f"Metrics written to {options.metrics_json} and {options.metrics_prom}")
@@ -1,13 +1,51 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
-import time, os, requests, re, platform, sys
+import time, os, re, platform, sys, queue, threading, argparse
 from urllib.parse import urljoin, urlparse
+from dell_browser import (PageReadiness, READY_TIMEOUT, harvest_page,
+                          selected_os_labels, block_resources, enable_performance_log, resource_report,
+                          profile_from_options, report_startup, DEFAULT_CACHE_SIZE_MB, SelectorCache,
+                          selector_cache_from_options, click_element, open_os_dropdown, CLICK_METHODS,
+                          DEFAULT_SELECTOR_CACHE, find_free_port)
+from dell_catalog import fetch_bin_entries, driver_names, published_checksums, DELL_API_BASE
+from dell_downloader import (DownloadJob, HttpTransport, USER_AGENT, add_scheduler_arguments,
+                             scheduler_from_options, export_metrics)
+from dell_fleet import (DriverTarget, DEFAULT_SAVED_CATALOG, catalog_targets, load_catalog, load_fleet,
+                        save_catalog)
+from dell_replay import BASE_KEY, PageRecorder, page_key
+from dell_retention import add_retention_arguments, apply_retention
 
-def setup_driver():
+PRODUCT_CODE = "poweredge-r440"
+DRIVERS_URL_TEMPLATE = "https://www.dell.com/support/home/ko-kr/product-support/product/{product}/drivers"
+BASE_URL = DRIVERS_URL_TEMPLATE.replace("{product}", PRODUCT_CODE)
+
+# Define OS options to check (data-value: name)
+OS_OPTIONS = {
+    'BIOSA': 'BIOS',
+    'RHEL9': 'Red Hat Enterprise Linux 9',
+    'RHEL8': 'Red Hat Enterprise Linux 8',
+    'RHE70': 'Red Hat Enterprise Linux 7',
+    'RH60': 'Red Hat Enterprise Linux 6',
+    'US008': 'Ubuntu Server 20.04 LTS',
+    'US004': 'Ubuntu Server 18.04 LTS',
+    'US001': 'Ubuntu Server 16.04 LTS',
+    'SLE15': 'SUSE Linux ES 15',
+    'SLE12': 'SUSE Linux ES 12',
+    'XI80': 'VMware ESXi 8.0',
+    'XI70': 'VMware ESXi 7.0',
+    'XI67': 'VMware ESXi 6.7',
+    'XI65': 'VMware ESXi 6.5',
+    'XI60': 'VMware ESXi 6.0',
+    'CXS09': 'Citrix XenServer 7.1',
+    'WS22L': 'Windows Server 2022 LTSC',
+    'WS19L': 'Windows Server 2019 LTSC',
+    'WST14': 'Windows Server 2016',
+    'W12R2': 'Windows Server 2012 R2',
+    'NAA': '해당 없음'
+}
+
+def setup_driver(debug_port=None, block=True, profile=None):
+    # Imported here so commands that never open a browser don't pay for Selenium
+    from selenium import webdriver
+    
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")
     options.add_argument("--window-size=1920,1080")
@@ -15,9 +53,13 @@ def setup_driver():
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
     options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_argument("--disable-images")
-    options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    # --disable-images is ignored by current Chrome; this setting still works
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    enable_performance_log(options)
+    if profile is not None:
+        for argument in profile.chrome_arguments():
+            options.add_argument(argument)
     
     # Platform-specific configurations
     current_platform = platform.system().lower()
@@ -28,7 +70,7 @@ def setup_driver():
         options.add_argument("--disable-background-timer-throttling")
         options.add_argument("--disable-backgrounding-occluded-windows")
         options.add_argument("--disable-renderer-backgrounding")
-        options.add_argument("--remote-debugging-port=9222")
+        options.add_argument(f"--remote-debugging-port={debug_port or find_free_port()}")
     elif current_platform == "darwin":  # macOS
         options.add_argument("--disable-web-security")
         options.add_argument("--allow-running-insecure-content")
@@ -36,6 +78,8 @@ def setup_driver():
     try:
         driver = webdriver.Chrome(options=options)
         print("Chrome driver initialized successfully")
+        if block:
+            block_resources(driver)
         return driver
     except Exception as e:
         print(f"Error initializing Chrome driver: {e}")
@@ -51,6 +95,10 @@ def setup_driver():
 
 def find_search_input(driver):
     """Try multiple selectors to find the search input"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    
     possible_selectors = [
         (By.ID, "mh-search-input"),
         (By.ID, "inpEntry"),
@@ -74,71 +122,45 @@ def find_search_input(driver):
     
     return None
 
-def select_os_by_data_value(driver, os_data_value, os_name):
-    """Select specific OS by data-value with enhanced clicking"""
+def select_os_by_data_value(driver, os_data_value, os_name, readiness=None, selectors=None, previous=None):
+    """Select specific OS by data-value with enhanced clicking.
+    
+    `selectors` is a SelectorCache; the dropdown selector, OS selector and
+    click method that last worked are tried first and outcomes recorded.
+    `previous` are the .bin links on screen before an in-place switch; the
+    selection only counts once the listing has moved away from them.
+    """
+    from selenium.webdriver.common.by import By
+    
     print(f"Attempting to select {os_name} (data-value: {os_data_value})...")
     
+    if readiness is None:
+        readiness = PageReadiness(driver)
+    if selectors is None:
+        selectors = SelectorCache(None)
+    
     try:
-        # Wait for page to load
-        time.sleep(5)
+        # Wait for the OS dropdown to render
+        readiness.wait_for_dropdown(legacy_sleep=5)
         
         # Method 1: Try to find and open OS dropdown
-        dropdown_selectors = [
-            "button[aria-haspopup='listbox']",
-            "select[name*='os']",
-            "select[id*='os']",
-            ".dropdown-toggle",
-            "[role='combobox']",
-            "button[aria-expanded='false']",
-            "button[data-toggle='dropdown']"
-        ]
-        
-        dropdown_opened = False
-        for selector in dropdown_selectors:
-            try:
-                dropdowns = driver.find_elements(By.CSS_SELECTOR, selector)
-                print(f"Found {len(dropdowns)} elements with selector: {selector}")
-                
-                for dropdown in dropdowns:
-                    if dropdown.is_displayed() and dropdown.is_enabled():
-                        print(f"Clicking dropdown with selector: {selector}")
-                        
-                        # Scroll into view
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", dropdown)
-                        time.sleep(1)
-                        
-                        # Try to click
-                        try:
-                            dropdown.click()
-                        except:
-                            driver.execute_script("arguments[0].click();", dropdown)
-                        
-                        time.sleep(3)
-                        dropdown_opened = True
-                        break
-                        
-                if dropdown_opened:
-                    break
-                    
-            except Exception as e:
-                print(f"Error with selector {selector}: {e}")
-                continue
-        
-        if not dropdown_opened:
+        if not open_os_dropdown(driver, readiness, selectors):
             print("Could not open any dropdown, trying direct OS element access...")
         else:
             print("Dropdown opened successfully")
         
         # Method 2: Try multiple approaches to find and click OS option
+        # Templates are cached by their {code} form so every OS shares what was learned
         os_selectors = [
-            (f"button[data-value='{os_data_value}']", f"{os_name} - data-value"),
-            (f"*[data-value='{os_data_value}']", f"{os_name} - any element"),
-            (f"option[value='{os_data_value}']", f"{os_name} - option"),
-            (f"li[data-value='{os_data_value}']", f"{os_name} - list item"),
+            ("button[data-value='{code}']", f"{os_name} - data-value"),
+            ("*[data-value='{code}']", f"{os_name} - any element"),
+            ("option[value='{code}']", f"{os_name} - option"),
+            ("li[data-value='{code}']", f"{os_name} - list item"),
         ]
         
         # Try CSS selectors first
-        for selector, description in os_selectors:
+        for template, description in selectors.order("os-option", os_selectors, key=lambda item: item[0]):
+            selector = template.format(code=os_data_value)
             try:
                 os_elements = driver.find_elements(By.CSS_SELECTOR, selector)
                 print(f"Found {len(os_elements)} elements for {description}")
@@ -157,63 +179,27 @@ def select_os_by_data_value(driver, os_data_value, os_name):
                             
                             # Scroll to element
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", os_element)
-                            time.sleep(2)
-                            
-                            # Multiple click attempts
-                            click_success = False
-                            
-                            # Method 1: Regular click
-                            try:
-                                os_element.click()
-                                click_success = True
-                                print("Regular click successful")
-                            except Exception as e:
-                                print(f"Regular click failed: {e}")
-                            
-                            # Method 2: JavaScript click
-                            if not click_success:
-                                try:
-                                    driver.execute_script("arguments[0].click();", os_element)
-                                    click_success = True
-                                    print("JavaScript click successful")
-                                except Exception as e:
-                                    print(f"JavaScript click failed: {e}")
-                            
-                            # Method 3: Action chains
-                            if not click_success:
-                                try:
-                                    from selenium.webdriver.common.action_chains import ActionChains
-                                    ActionChains(driver).move_to_element(os_element).click().perform()
-                                    click_success = True
-                                    print("ActionChains click successful")
-                                except Exception as e:
-                                    print(f"ActionChains click failed: {e}")
                             
-                            # Method 4: Force click with coordinates
-                            if not click_success:
-                                try:
-                                    driver.execute_script("arguments[0].click(); arguments[0].dispatchEvent(new Event('change'));", os_element)
-                                    click_success = True
-                                    print("Force click with event successful")
-                                except Exception as e:
-                                    print(f"Force click failed: {e}")
+                            # Multiple click attempts, cached method first
+                            method = click_element(driver, os_element, selectors.order("click", CLICK_METHODS))
                             
-                            if click_success:
+                            if method:
                                 print("Click executed, waiting for page update...")
-                                time.sleep(8)  # Wait longer for page to update
+                                bin_count = readiness.wait_for_bin_links(legacy_sleep=10, previous=previous)
                                 
                                 # Check if selection worked
                                 new_url = driver.current_url
-                                page_source = driver.page_source.lower()
                                 
                                 print(f"After click - URL: {new_url}")
-                                print(f"Checking for {os_name} content in page...")
+                                print(f"Found {bin_count} .bin files after selection")
                                 
-                                # Check for .bin files immediately
-                                bin_check = driver.find_elements(By.XPATH, "//a[contains(@href, '.bin') or contains(@href, '.BIN')]")
-                                print(f"Found {len(bin_check)} .bin files after selection")
-                                
-                                if len(bin_check) > 5 or os_data_value.lower() in new_url.lower():
+                                selected = bin_count > 5 or os_data_value.lower() in new_url.lower()
+                                if previous is not None and not bin_count:
+                                    # Still the previous OS's listing, whatever the URL says
+                                    selected = False
+                                selectors.record("os-option", template, selected)
+                                selectors.record("click", method, selected)
+                                if selected:
                                     print(f"Successfully selected {os_name}!")
                                     return True
                                 else:
@@ -224,6 +210,9 @@ def select_os_by_data_value(driver, os_data_value, os_name):
                     except Exception as e:
                         print(f"Error with element: {e}")
                         continue
+                
+                if not os_elements:
+                    selectors.record("os-option", template, False)
                         
             except Exception as e:
                 print(f"Error with selector {selector}: {e}")
@@ -237,6 +226,9 @@ def select_os_by_data_value(driver, os_data_value, os_name):
         import traceback
         traceback.print_exc()
         return False
+    
+    finally:
+        selectors.save()
 
 def find_bin_files(driver):
     """Enhanced search for .bin files using multiple methods"""
@@ -244,11 +236,12 @@ def find_bin_files(driver):
     
     bin_links = []
     
+    # One round-trip for every href and data-* attribute; filtering happens here
+    harvest = harvest_page(driver)
+    
     # Method 1: Direct href links
-    all_links = driver.find_elements(By.TAG_NAME, "a")
-    for link in all_links:
-        href = link.get_attribute("href")
-        if href and (href.lower().endswith(".bin") or href.endswith(".BIN")):
+    for href in harvest['hrefs']:
+        if href and href.lower().endswith(".bin"):
             bin_links.append(href)
     
     print(f"Method 1 - Direct href links: Found {len(bin_links)} .bin files")
@@ -283,189 +276,556 @@ def find_bin_files(driver):
     
     return bin_links
 
-def download_file(url, filepath):
-    """Download a file with progress indication"""
+class BrowserSession:
+    """Start Chrome on first use, so catalog-only runs never launch a browser"""
+    
+    def __init__(self, debug_port=None, label="browser", transport=None, block=True, profile=None,
+                 selectors=None, recorder=None):
+        # A free port per browser, so several sessions or runs never share one
+        self.debug_port = debug_port or find_free_port()
+        self.block = block
+        # Persistent profile slot, locked while this browser runs
+        self.profile = profile
+        self.startup = None
+        self.first_load = None
+        # Learned selectors, shared by every session of a run
+        self.selectors = selectors if selectors is not None else SelectorCache(None)
+        self.label = label
+        self.transport = transport
+        self.driver = None
+        # Product whose drivers page is loaded, for switching OS without reloading
+        self.page_loaded = None
+        self.last_bins = set()
+        self.full_loads = 0
+        self.in_place_switches = 0
+        # Saves each page as served for offline replay (--record)
+        self.recorder = recorder
+        # (os_name, phase, seconds) for every load/select/harvest step
+        self.phases = []
+    
+    def get(self):
+        if self.driver is None:
+            print(f"[{self.label}] Starting Chrome on debugging port {self.debug_port}")
+            if self.profile is not None:
+                self.profile.acquire()
+            started = time.monotonic()
+            try:
+                self.driver = setup_driver(debug_port=self.debug_port, block=self.block, profile=self.profile)
+            except SystemExit:
+                # setup_driver() exits the process on failure; keep that local to this session
+                self.release_profile()
+                raise RuntimeError("Chrome driver could not be started")
+            self.startup = time.monotonic() - started
+        return self.driver
+    
+    def quit(self):
+        if self.driver is not None:
+            # Hand the browser's cookies to the download transport before closing
+            if self.transport is not None:
+                self.transport.seed_from_driver(self.driver)
+            self.driver.quit()
+            self.driver = None
+            self.page_loaded = None
+            print(f"[{self.label}] Browser closed after {self.full_loads} page loads "
+                  f"and {self.in_place_switches} in-place OS switches.")
+        self.release_profile()
+    
+    def release_profile(self):
+        if self.profile is not None:
+            self.profile.release()
+    
+    def record_phase(self, os_name, phase, started):
+        elapsed = time.monotonic() - started
+        self.phases.append((os_name, phase, elapsed))
+        return elapsed
+    
+    def record_first_load(self, elapsed):
+        """Report cold/warm startup cost once per browser"""
+        if self.first_load is None and self.startup is not None:
+            self.first_load = elapsed
+            report_startup(self.profile, self.startup, elapsed)
+    
+    def save_page(self, target, base=False):
+        """Record the page on screen as target's OS page, or as its product's base page.
+        
+        The first page recorded for a product also becomes its base, so
+        --navigation url, which never loads the plain drivers page, still
+        leaves a base page to replay.
+        """
+        if self.recorder is None or self.driver is None:
+            return
+        page_source, url = self.driver.page_source, self.driver.current_url
+        base_key = page_key(target.product, BASE_KEY)
+        if base or not self.recorder.has(base_key):
+            self.recorder.save(base_key, page_source, url)
+        if not base:
+            self.recorder.save(page_key(target.product, target.os_code), page_source, url)
+
+def os_page_url(os_data_value, base_url=BASE_URL):
+    """Drivers page URL that opens with one OS already selected"""
+    return f"{base_url}?oscode={os_data_value}"
+
+def load_drivers_page(driver, readiness, os_name, url=BASE_URL, product=PRODUCT_CODE):
+    """Full page load. Returns False on a login redirect or an unexpected page."""
+    print(f"Loading drivers page: {url}")
+    driver.get(url)
+    readiness.wait_for_document(legacy_sleep=5)
+    
+    current_url = driver.current_url
+    print(f"Current URL: {current_url}")
+    
+    # Check if we got redirected to login
+    if any(login_indicator in current_url for login_indicator in 
+           ["login.microsoftonline.com", "login.dell.com", "oauth", "saml"]):
+        print(f"Got redirected to login page, skipping {os_name}...")
+        return False
+    
+    # Check if the page loaded successfully
+    if product not in current_url and "dell.com" not in current_url:
+        print(f"Failed to load drivers page, skipping {os_name}...")
+        return False
+    
+    return True
+
+def os_switch_confirmed(session, target, bin_files):
+    """Whether the listing on screen belongs to the target OS after an in-place switch"""
+    if not bin_files:
+        return False
+    # The dropdown label changes before the listing does, so an unchanged listing is never confirmed
+    if set(bin_files) == session.last_bins:
+        return False
+    labels = selected_os_labels(session.driver)
+    if labels:
+        return any(target.os_name.lower() in label.lower() for label in labels)
+    # No readable dropdown text: the listing has changed, which is as good as it gets
+    return True
+
+def switch_os_in_place(session, target, readiness, options):
+    """Show the target OS without reloading the base page.
+    
+    Returns the .bin links, or None if the switch could not be confirmed and
+    the caller should fall back to a full reload.
+    """
+    driver = session.driver
+    if options.navigation == "url":
+        load_started = time.monotonic()
+        loaded = load_drivers_page(driver, readiness, target.label,
+                                   os_page_url(target.os_code, target.drivers_url(options.drivers_url)),
+                                   target.product)
+        if loaded:
+            readiness.wait_for_bin_links(legacy_sleep=10)
+        session.record_first_load(session.record_phase(target.label, "load", load_started))
+        if not loaded:
+            return None
+    else:
+        print(f"Switching to {target.label} on the loaded page...")
+        select_started = time.monotonic()
+        selected = select_os_by_data_value(driver, target.os_code, target.os_name, readiness, session.selectors,
+                                           previous=session.last_bins or None)
+        session.record_phase(target.label, "select", select_started)
+        if not selected:
+            return None
+    
+    harvest_started = time.monotonic()
+    bin_files = find_bin_files(driver)
+    session.record_phase(target.label, "harvest", harvest_started)
+    if not os_switch_confirmed(session, target, bin_files):
+        print(f"Could not confirm {target.label} is shown, falling back to a full reload...")
+        return None
+    session.save_page(target)
+    return bin_files
+
+def discover_with_browser(session, target, options):
+    """Select one OS on the product's drivers page and scrape its .bin links.
+    
+    With --navigation in-place the page is loaded once per browser and
+    product, and later OS entries are switched through the dropdown;
+    --navigation url opens the OS-parameterised URL instead. Either falls
+    back to a full reload.
+    """
+    driver = session.get()
+    
+    # The fixed sleeps this replaces cost ~25s per OS
+    readiness = PageReadiness(driver, timeout=options.wait_timeout)
+    
     try:
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
+        if options.navigation == "url" or (options.navigation == "in-place"
+                                           and session.page_loaded == target.product):
+            bin_files = switch_os_in_place(session, target, readiness, options)
+            if bin_files is not None:
+                session.in_place_switches += 1
+                session.last_bins = set(bin_files)
+                return bin_files
         
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
+        # Full reload of the base drivers page
+        session.page_loaded = None
+        session.full_loads += 1
+        load_started = time.monotonic()
+        loaded = load_drivers_page(driver, readiness, target.label, target.drivers_url(options.drivers_url),
+                                   target.product)
+        session.record_first_load(session.record_phase(target.label, "load", load_started))
+        if not loaded:
+            return []
+        session.save_page(target, base=True)
         
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r  Progress: {percent:.1f}%", end='', flush=True)
+        # Now select the specific OS
+        print(f"Selecting {target.label}...")
+        select_started = time.monotonic()
+        os_selected = select_os_by_data_value(driver, target.os_code, target.os_name, readiness,
+                                              session.selectors)
+        session.record_phase(target.label, "select", select_started)
         
-        print(f"\n  Successfully downloaded: {os.path.basename(filepath)}")
-        return True
-    except Exception as e:
-        print(f"\n  Error downloading {url}: {e}")
-        return False
+        if not os_selected:
+            print(f"Failed to select {target.label}, skipping...")
+            return []
+        session.page_loaded = target.product
+        
+        # Find .bin files for this OS
+        print(f"Searching for .bin files for {target.label}...")
+        harvest_started = time.monotonic()
+        bin_files = find_bin_files(driver)
+        session.record_phase(target.label, "harvest", harvest_started)
+        session.last_bins = set(bin_files)
+        session.save_page(target)
+        return bin_files
+    
+    finally:
+        readiness.report(target.label)
+        resource_report(driver, target.label)
 
-def main():
-    # Define OS options to check (data-value: name)
-    os_options = {
-        'BIOSA': 'BIOS',
-        'RHEL9': 'Red Hat Enterprise Linux 9',
-        'RHEL8': 'Red Hat Enterprise Linux 8',
-        'RHE70': 'Red Hat Enterprise Linux 7',
-        'RH60': 'Red Hat Enterprise Linux 6',
-        'US008': 'Ubuntu Server 20.04 LTS',
-        'US004': 'Ubuntu Server 18.04 LTS',
-        'US001': 'Ubuntu Server 16.04 LTS',
-        'SLE15': 'SUSE Linux ES 15',
-        'SLE12': 'SUSE Linux ES 12',
-        'XI80': 'VMware ESXi 8.0',
-        'XI70': 'VMware ESXi 7.0',
-        'XI67': 'VMware ESXi 6.7',
-        'XI65': 'VMware ESXi 6.5',
-        'XI60': 'VMware ESXi 6.0',
-        'CXS09': 'Citrix XenServer 7.1',
-        'WS22L': 'Windows Server 2022 LTSC',
-        'WS19L': 'Windows Server 2019 LTSC',
-        'WST14': 'Windows Server 2016',
-        'W12R2': 'Windows Server 2012 R2',
-        'NAA': '해당 없음'
-    }
+def discover_os(session, target, options, published, drivers):
+    """Ask the HTTP catalog first and fall back to the browser if it fails.
     
-    try:
-        driver = setup_driver()
-    except Exception as e:
-        print(f"Failed to initialize Chrome driver: {e}")
-        return
+    Checksums the catalog publishes are collected into `published` (url -> hashes),
+    its driver names into `drivers` (url -> name).
+    """
+    if options.discovery != "browser":
+        entries = fetch_bin_entries(target.product, target.os_code, api_base=options.catalog_url,
+                                    session=session.transport.session if session.transport else None,
+                                    recorder=session.recorder)
+        published.update(published_checksums(entries))
+        drivers.update(driver_names(entries))
+        bin_files = [entry["url"] for entry in entries]
+        if bin_files or options.discovery == "http":
+            return bin_files
+        print(f"Catalog returned nothing for {target.label}, falling back to the browser...")
+    
+    return discover_with_browser(session, target, options)
+
+def build_os_jobs(bin_files, target, options, published):
+    """Turn one OS's .bin links into download jobs under the target's folder"""
+    # Create OS-specific directory (downloads/<OS>/, or downloads/<model>/<OS>/ in fleet mode)
+    os_dir = target.directory
+    os.makedirs(os_dir, exist_ok=True)
+    
+    jobs = []
+    skipped = 0
+    for j, url in enumerate(bin_files):
+        filename = os.path.basename(urlparse(url).path)
+        if not filename or '.' not in filename:
+            filename = f"driver_{j}.bin"
         
-    all_bin_files = {}  # Dictionary to store OS -> [bin_files]
-    download_summary = {}
+        filepath = os.path.join(os_dir, filename)
+        
+        # Skip if file already exists (with the manifest on, the scheduler revalidates it instead)
+        if options.no_manifest and os.path.exists(filepath):
+            print(f"Skipping {filename} (already exists)")
+            skipped += 1
+            continue
+        
+        jobs.append(DownloadJob(url, filepath, group=target.label, expected=published.get(url)))
+    
+    return jobs, skipped
+
+def process_os(session, index, total, target, all_bin_files, results_lock, options, published, drivers,
+               pipeline=None):
+    """Discover one target's .bin files and record them in all_bin_files.
+    
+    With a pipeline the files are also handed to its download workers right away.
+    """
+    print(f"\n{'='*60}")
+    print(f"Processing OS {index}/{total}: {target.label}")
+    print(f"{'='*60}")
     
     try:
-        print("Starting comprehensive Dell PowerEdge R440 driver collection...")
-        print(f"Will check {len(os_options)} different operating systems")
+        bin_files = discover_os(session, target, options, published, drivers)
         
-        for i, (os_data_value, os_name) in enumerate(os_options.items(), 1):
-            print(f"\n{'='*60}")
-            print(f"Processing OS {i}/{len(os_options)}: {os_name}")
-            print(f"{'='*60}")
-            
-            # First load the base drivers page
-            base_url = "https://www.dell.com/support/home/ko-kr/product-support/product/poweredge-r440/drivers"
-            print(f"Loading base drivers page: {base_url}")
+        print(f"Found {len(bin_files)} .bin files for {target.label}")
+        
+        if bin_files:
+            # Show first few files found
+            print(f"Sample files found for {target.label}:")
+            for j, url in enumerate(bin_files[:5]):
+                filename = os.path.basename(urlparse(url).path)
+                print(f"  {j+1}: {filename}")
             
+            # Worker threads share this dictionary
+            with results_lock:
+                all_bin_files[target] = bin_files
+            if pipeline is not None:
+                pipeline.put(target, bin_files, session)
+        else:
+            print(f"No .bin files found for {target.label}")
+        
+    except Exception as e:
+        print(f"Error processing {target.label}: {e}")
+        import traceback
+        traceback.print_exc()
+
+def download_all(all_bin_files, options, transport=None, published=None, drivers=None):
+    """Download every discovered file through one scheduler and summarise per OS"""
+    jobs = []
+    download_summary = {}
+    for target, bin_files in all_bin_files.items():
+        bin_files = apply_retention(bin_files, options, target.directory, target.label, drivers)
+        os_jobs, skipped = build_os_jobs(bin_files, target, options, published or {})
+        jobs.extend(os_jobs)
+        download_summary[target.label] = {
+            'total_files': len(bin_files),
+            'successful_downloads': skipped
+        }
+    
+    print(f"\nScheduling {len(jobs)} downloads across {len(all_bin_files)} operating systems")
+    scheduler = scheduler_from_options(options, transport)
+    for job in scheduler.run(jobs):
+        if job.ok:
+            download_summary[job.group]['successful_downloads'] += 1
+    export_metrics(scheduler, options)
+    
+    return download_summary
+
+class DownloadPipeline:
+    """Downloads each target's files while the browser moves on to the next target.
+    
+    Discovered targets wait in a queue of at most `depth` entries. The feeder
+    hands the next one to the scheduler only once everything submitted before
+    it has been picked up by a download worker, so discovery blocks in put()
+    when it gets more than `depth` targets ahead of the downloads.
+    """
+    
+    def __init__(self, options, transport, published, drivers, depth):
+        self.options = options
+        self.transport = transport
+        self.published = published
+        self.drivers = drivers
+        self.queue = queue.Queue(maxsize=max(1, depth))
+        self.scheduler = scheduler_from_options(options, transport)
+        self.download_summary = {}
+        self.blocked = 0.0
+        self._cookies_seeded = False
+        self._thread = threading.Thread(target=self._feed, name="download-feeder", daemon=True)
+        self._started = None
+    
+    def start(self):
+        self._started = time.monotonic()
+        self.scheduler.start()
+        self._thread.start()
+        return self
+    
+    def put(self, target, bin_files, session=None):
+        # Downloads start before the browser quits, so hand over its cookies now
+        if not self._cookies_seeded and session is not None and session.driver is not None and self.transport:
+            self.transport.seed_from_driver(session.driver)
+            self._cookies_seeded = True
+        started = time.monotonic()
+        self.queue.put((target, bin_files))
+        self.blocked += time.monotonic() - started
+    
+    def _feed(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            target, bin_files = item
             try:
-                driver.get(base_url)
-                time.sleep(5)  # Wait for page to load
-                
-                current_url = driver.current_url
-                print(f"Current URL: {current_url}")
-                
-                # Check if we got redirected to login
-                if any(login_indicator in current_url for login_indicator in 
-                       ["login.microsoftonline.com", "login.dell.com", "oauth", "saml"]):
-                    print(f"Got redirected to login page, skipping {os_name}...")
-                    continue
-                
-                # Check if the page loaded successfully
-                if "poweredge-r440" not in current_url and "dell.com" not in current_url:
-                    print(f"Failed to load drivers page, skipping {os_name}...")
-                    continue
-                
-                # Now select the specific OS
-                print(f"Selecting {os_name}...")
-                os_selected = select_os_by_data_value(driver, os_data_value, os_name)
-                
-                if not os_selected:
-                    print(f"Failed to select {os_name}, skipping...")
-                    continue
-                
-                # Find .bin files for this OS
-                print(f"Searching for .bin files for {os_name}...")
-                bin_files = find_bin_files(driver)
-                
-                print(f"Found {len(bin_files)} .bin files for {os_name}")
-                
-                if bin_files:
-                    all_bin_files[os_name] = bin_files
-                    
-                    # Create OS-specific directory
-                    os_safe_name = re.sub(r'[<>:"/\\|?*]', '_', os_name)
-                    os_dir = os.path.join("downloads", os_safe_name)
-                    os.makedirs(os_dir, exist_ok=True)
-                    
-                    # Show first few files found
-                    print(f"Sample files found for {os_name}:")
-                    for j, url in enumerate(bin_files[:5]):
-                        filename = os.path.basename(urlparse(url).path)
-                        print(f"  {j+1}: {filename}")
-                    
-                    # Download files for this OS
-                    successful_downloads = 0
-                    print(f"Downloading files to: {os_dir}")
-                    
-                    for j, url in enumerate(bin_files):
-                        filename = os.path.basename(urlparse(url).path)
-                        if not filename or '.' not in filename:
-                            filename = f"driver_{j}.bin"
-                        
-                        filepath = os.path.join(os_dir, filename)
-                        
-                        # Skip if file already exists
-                        if os.path.exists(filepath):
-                            print(f"Skipping {filename} (already exists)")
-                            successful_downloads += 1
-                            continue
-                        
-                        print(f"Downloading {j+1}/{len(bin_files)}: {filename}")
-                        if download_file(url, filepath):
-                            successful_downloads += 1
-                    
-                    download_summary[os_name] = {
-                        'total_files': len(bin_files),
-                        'successful_downloads': successful_downloads
-                    }
-                    
-                    print(f"Completed {os_name}: {successful_downloads}/{len(bin_files)} files downloaded")
-                else:
-                    print(f"No .bin files found for {os_name}")
-                
-                # Small delay before next OS
-                time.sleep(3)
-                
+                bin_files = apply_retention(bin_files, self.options, target.directory, target.label,
+                                            self.drivers)
+                jobs, skipped = build_os_jobs(bin_files, target, self.options, self.published)
+                self.download_summary[target.label] = {
+                    'total_files': len(bin_files),
+                    'successful_downloads': skipped
+                }
+                print(f"\nQueueing {len(jobs)} downloads for {target.label}")
+                self.scheduler.submit(jobs)
+                # Back-pressure: take the next target only once these are all under way
+                self.scheduler.wait_for_pending()
             except Exception as e:
-                print(f"Error processing {os_name}: {e}")
+                print(f"Error queueing downloads for {target.label}: {e}")
                 import traceback
                 traceback.print_exc()
-                continue
-        
-        # Final summary
-        print(f"\n{'='*80}")
-        print("FINAL DOWNLOAD SUMMARY")
-        print(f"{'='*80}")
-        
-        total_files = 0
-        total_successful = 0
-        
-        for os_name, summary in download_summary.items():
-            files = summary['total_files']
-            success = summary['successful_downloads']
-            total_files += files
-            total_successful += success
+    
+    def finish(self, targets):
+        """Wait for every queued download and return the per-target summary"""
+        discovery = time.monotonic() - self._started
+        self.queue.put(None)
+        self._thread.join()
+        for job in self.scheduler.finish():
+            if job.ok:
+                self.download_summary[job.group]['successful_downloads'] += 1
+        export_metrics(self.scheduler, self.options)
+        print(f"Pipeline: discovery took {discovery:.1f}s (waited {self.blocked:.1f}s on a full queue), "
+              f"end to end {time.monotonic() - self._started:.1f}s")
+        # Targets finish discovery in any order; keep the summary in target order
+        return {target.label: self.download_summary[target.label] for target in targets
+                if target.label in self.download_summary}
+
+def os_worker(worker_id, os_queue, total, all_bin_files, results_lock, options, transport, published,
+              drivers, selectors, recorder, pipeline=None):
+    """Pull targets from the shared queue and process them on a private browser"""
+    session = BrowserSession(label=f"worker {worker_id}", transport=transport,
+                             block=not options.no_block_resources, profile=profile_from_options(options),
+                             selectors=selectors, recorder=recorder)
+    
+    try:
+        while True:
+            try:
+                index, target = os_queue.get_nowait()
+            except queue.Empty:
+                break
             
-            print(f"{os_name}: {success}/{files} files downloaded")
+            print(f"[worker {worker_id}] Took {target.label}")
+            process_os(session, index, total, target, all_bin_files, results_lock, options, published,
+                       drivers, pipeline)
+    finally:
+        session.quit()
+
+def run_worker_pool(targets, workers, all_bin_files, results_lock, options, transport, published,
+                    drivers, selectors, recorder, pipeline=None):
+    """Process targets on `workers` concurrent headless Chrome sessions"""
+    os_queue = queue.Queue()
+    # Queued in target order, so each product's OS entries stay together for in-place switching
+    for i, target in enumerate(targets, 1):
+        os_queue.put((i, target))
+    
+    threads = []
+    for worker_id in range(1, workers + 1):
+        thread = threading.Thread(
+            target=os_worker,
+            args=(worker_id, os_queue, len(targets), all_bin_files, results_lock, options, transport,
+                  published, drivers, selectors, recorder, pipeline),
+            name=f"os-worker-{worker_id}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    
+    for thread in threads:
+        thread.join()
+
+def print_summary(download_summary):
+    # Final summary
+    print(f"\n{'='*80}")
+    print("FINAL DOWNLOAD SUMMARY")
+    print(f"{'='*80}")
+    
+    total_files = 0
+    total_successful = 0
+    
+    for os_name, summary in download_summary.items():
+        files = summary['total_files']
+        success = summary['successful_downloads']
+        total_files += files
+        total_successful += success
         
-        print(f"\nOverall Summary:")
-        print(f"Total .bin files found: {total_files}")
-        print(f"Successfully downloaded: {total_successful}")
-        print(f"Failed downloads: {total_files - total_successful}")
-        print(f"Operating systems with .bin files: {len(download_summary)}")
+        print(f"{os_name}: {success}/{files} files downloaded")
+    
+    print(f"\nOverall Summary:")
+    print(f"Total .bin files found: {total_files}")
+    print(f"Successfully downloaded: {total_successful}")
+    print(f"Failed downloads: {total_files - total_successful}")
+    print(f"Operating systems with .bin files: {len(download_summary)}")
+    
+    # Show which OS had the most files
+    if download_summary:
+        max_files_os = max(download_summary.items(), key=lambda x: x[1]['total_files'])
+        print(f"OS with most .bin files: {max_files_os[0]} ({max_files_os[1]['total_files']} files)")
+
+def default_targets():
+    """Every known OS for the R440, in OS_OPTIONS order"""
+    return [DriverTarget(PRODUCT_CODE, os_data_value, os_name) for os_data_value, os_name in OS_OPTIONS.items()]
+
+def download_from_catalog(options):
+    """Download what the last saved discovery found, without scraping again"""
+    try:
+        all_bin_files, published, drivers = catalog_targets(load_catalog(options.saved_catalog))
+    except (OSError, ValueError) as e:
+        print(f"No saved catalog at {options.saved_catalog} ({e}); run a discovery first")
+        return
+    print(f"Using {len(all_bin_files)} targets from {options.saved_catalog}")
+    
+    transport = HttpTransport(pool_size=options.download_workers * 2)
+    try:
+        print_summary(download_all(all_bin_files, options, transport, published, drivers))
+    finally:
+        transport.close()
+
+def main(options=None):
+    if options is None:
+        options = parse_args([])
+    if options.from_catalog:
+        download_from_catalog(options)
+        return
+    targets = load_fleet(options.fleet, OS_OPTIONS) if options.fleet else default_targets()
+    
+    all_bin_files = {}  # Dictionary to store DriverTarget -> [bin_files]
+    published = {}  # Dictionary to store url -> checksums published by Dell
+    drivers = {}  # Dictionary to store url -> driver name from Dell's listing
+    results_lock = threading.Lock()
+    # One pooled keep-alive session for the catalog and every download
+    transport = HttpTransport(pool_size=max(options.download_workers, options.workers) * 2)
+    # Which dropdown/OS selectors and click methods worked last time
+    selectors = selector_cache_from_options(options)
+    recorder = PageRecorder(options.record) if options.record else None
+    
+    if options.fleet:
+        print("Starting Dell fleet driver collection...")
+    else:
+        print("Starting comprehensive Dell PowerEdge R440 driver collection...")
+    print(f"Will check {len(targets)} different operating systems")
+    
+    # Download each target's files while the next one is being discovered
+    pipeline = None
+    if options.pipeline and not options.discover_only:
+        print(f"Pipelining downloads with discovery (queue depth {options.pipeline_depth})")
+        pipeline = DownloadPipeline(options, transport, published, drivers, options.pipeline_depth).start()
+    
+    if options.workers > 1:
+        print(f"Using {options.workers} parallel workers")
+        try:
+            run_worker_pool(targets, options.workers, all_bin_files, results_lock, options, transport,
+                            published, drivers, selectors, recorder, pipeline)
+            # Workers finish in any order; keep the summary in target order
+            all_bin_files = {target: all_bin_files[target] for target in targets if target in all_bin_files}
+            save_catalog(all_bin_files, published, options.saved_catalog, drivers)
+            if options.discover_only:
+                return
+            if pipeline is not None:
+                print_summary(pipeline.finish(targets))
+                return
+            print_summary(download_all(all_bin_files, options, transport, published, drivers))
+        except Exception as e:
+            print(f"Critical error: {e}")
+            import traceback
+            traceback.print_exc()
+        return
+    
+    session = BrowserSession(transport=transport, block=not options.no_block_resources,
+                             profile=profile_from_options(options), selectors=selectors, recorder=recorder)
+    
+    try:
+        for i, target in enumerate(targets, 1):
+            process_os(session, i, len(targets), target, all_bin_files, results_lock, options, published,
+                       drivers, pipeline)
         
-        # Show which OS had the most files
-        if download_summary:
-            max_files_os = max(download_summary.items(), key=lambda x: x[1]['total_files'])
-            print(f"OS with most .bin files: {max_files_os[0]} ({max_files_os[1]['total_files']} files)")
+        # Discovery is done; free the browser before the download phase
+        session.quit()
+        save_catalog(all_bin_files, published, options.saved_catalog, drivers)
+        if options.discover_only:
+            return
+        if pipeline is not None:
+            print_summary(pipeline.finish(targets))
+        else:
+            print_summary(download_all(all_bin_files, options, transport, published, drivers))
         
     except Exception as e:
         print(f"Critical error: {e}")
@@ -473,8 +833,57 @@ def main():
         traceback.print_exc()
     
     finally:
-        driver.quit()
-        print("Browser closed.")
+        session.quit()
+        transport.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Download Dell PowerEdge R440 .bin drivers for every OS")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of OS workers, each with its own headless Chrome (default: 1)")
+    parser.add_argument("--wait-timeout", type=float, default=READY_TIMEOUT,
+                        help=f"ceiling in seconds for each page readiness wait (default: {READY_TIMEOUT})")
+    parser.add_argument("--discovery", choices=["auto", "http", "browser"], default="auto",
+                        help="auto: HTTP catalog with browser fallback (default); "
+                             "http: catalog only; browser: Selenium only")
+    parser.add_argument("--navigation", choices=["in-place", "url", "reload"], default="in-place",
+                        help="in-place: load the drivers page once and switch OS via the dropdown (default); "
+                             "url: open the OS-parameterised URL; reload: reload the page for every OS")
+    parser.add_argument("--no-block-resources", action="store_true",
+                        help="let Chrome load images, fonts, media and third-party trackers")
+    parser.add_argument("--profile-dir", default=None,
+                        help="reuse a persistent Chrome profile and disk cache under this directory "
+                             "(one locked slot per browser; default: fresh profile every run)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f"size cap in MB for each persistent profile (default: {DEFAULT_CACHE_SIZE_MB})")
+    parser.add_argument("--selector-cache", default=DEFAULT_SELECTOR_CACHE,
+                        help=f"file remembering which page selectors worked (default: {DEFAULT_SELECTOR_CACHE})")
+    parser.add_argument("--no-selector-cache", action="store_true",
+                        help="always try selectors in their fixed order")
+    parser.add_argument("--fleet", default=None, metavar="CONFIG",
+                        help="JSON file listing models and OS codes to collect in one run (see dell_fleet.py)")
+    parser.add_argument("--drivers-url", default=DRIVERS_URL_TEMPLATE,
+                        help="drivers page to scrape, '{product}' is replaced by the product code; "
+                             "e.g. a dell_replay.py server (default: dell.com)")
+    parser.add_argument("--record", default=None, metavar="DIR",
+                        help="save every scraped page and catalog listing under DIR for offline replay "
+                             "with dell_replay.py")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="start downloading each OS's files as soon as it is discovered, "
+                             "while the browser moves on to the next OS")
+    parser.add_argument("--pipeline-depth", type=int, default=2,
+                        help="discovered OSes that may wait for download workers before discovery "
+                             "pauses (default: 2)")
+    parser.add_argument("--discover-only", action="store_true",
+                        help="save what discovery finds to the saved catalog and download nothing")
+    parser.add_argument("--from-catalog", action="store_true",
+                        help="skip discovery and download what the saved catalog lists")
+    parser.add_argument("--saved-catalog", default=DEFAULT_SAVED_CATALOG,
+                        help=f"where discovery results are saved (default: {DEFAULT_SAVED_CATALOG})")
+    parser.add_argument("--catalog-url", default=DELL_API_BASE,
+                        help=f"base URL of the driver listing API (default: {DELL_API_BASE})")
+    add_retention_arguments(parser)
+    add_scheduler_arguments(parser)
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args())
@@ -1,13 +1,22 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.keys import Keys
-import time, os, requests, re, platform, sys
+import time, os, re, platform, sys, argparse
 from urllib.parse import urljoin, urlparse
+from dell_browser import (PageReadiness, READY_TIMEOUT, harvest_page, is_bin_reference,
+                          block_resources, enable_performance_log, resource_report,
+                          profile_from_options, report_startup, DEFAULT_CACHE_SIZE_MB, SelectorCache,
+                          selector_cache_from_options, click_element, click_with, open_os_dropdown,
+                          CLICK_METHODS, DEFAULT_SELECTOR_CACHE, find_free_port)
+from dell_catalog import fetch_bin_entries, driver_names, published_checksums, DELL_API_BASE
+from dell_downloader import (DownloadJob, HttpTransport, USER_AGENT, add_scheduler_arguments,
+                             scheduler_from_options, export_metrics)
+from dell_retention import add_retention_arguments, apply_retention
 
-def setup_driver():
+PRODUCT_CODE = "poweredge-r440"
+UBUNTU_OS_CODE = "US008"
+
+def setup_driver(block=True, profile=None):
+    # Imported here so commands that never open a browser don't pay for Selenium
+    from selenium import webdriver
+    
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")
     options.add_argument("--window-size=1920,1080")
@@ -15,9 +24,13 @@ def setup_driver():
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
     options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_argument("--disable-images")
-    options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    # --disable-images is ignored by current Chrome; this setting still works
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    enable_performance_log(options)
+    if profile is not None:
+        for argument in profile.chrome_arguments():
+            options.add_argument(argument)
     
     # Platform-specific configurations
     current_platform = platform.system().lower()
@@ -28,7 +41,7 @@ def setup_driver():
         options.add_argument("--disable-background-timer-throttling")
         options.add_argument("--disable-backgrounding-occluded-windows")
         options.add_argument("--disable-renderer-backgrounding")
-        options.add_argument("--remote-debugging-port=9222")
+        options.add_argument(f"--remote-debugging-port={find_free_port()}")
     elif current_platform == "darwin":  # macOS
         options.add_argument("--disable-web-security")
         options.add_argument("--allow-running-insecure-content")
@@ -36,6 +49,8 @@ def setup_driver():
     try:
         driver = webdriver.Chrome(options=options)
         print("Chrome driver initialized successfully")
+        if block:
+            block_resources(driver)
         return driver
     except Exception as e:
         print(f"Error initializing Chrome driver: {e}")
@@ -51,6 +66,10 @@ def setup_driver():
 
 def find_search_input(driver):
     """Try multiple selectors to find the search input"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    
     possible_selectors = [
         (By.ID, "mh-search-input"),
         (By.ID, "inpEntry"),
@@ -74,57 +93,29 @@ def find_search_input(driver):
     
     return None
 
-def select_ubuntu_os(driver):
-    """Select Ubuntu Server 20.04 LTS with improved detection"""
+def select_ubuntu_os(driver, readiness=None, selectors=None):
+    """Select Ubuntu Server 20.04 LTS with improved detection.
+    
+    `selectors` is a SelectorCache; the selectors and click method that
+    last worked are tried first and outcomes recorded.
+    """
+    from selenium.webdriver.common.by import By
+    
     print("Looking for Ubuntu Server 20.04 LTS option...")
     
+    if readiness is None:
+        readiness = PageReadiness(driver)
+    if selectors is None:
+        selectors = SelectorCache(None)
+    
     try:
-        # Wait for page to fully load
-        time.sleep(5)
+        # Wait for the OS dropdown to render
+        readiness.wait_for_dropdown(legacy_sleep=5)
         
         print(f"Current page: {driver.current_url}")
         
         # Method 1: Try to find and open OS dropdown
-        dropdown_selectors = [
-            "button[aria-haspopup='listbox']",
-            "select[name*='os']",
-            "select[id*='os']",
-            ".dropdown-toggle",
-            "[role='combobox']",
-            "button[aria-expanded='false']",
-            "button[data-toggle='dropdown']"
-        ]
-        
-        dropdown_opened = False
-        for selector in dropdown_selectors:
-            try:
-                dropdowns = driver.find_elements(By.CSS_SELECTOR, selector)
-                print(f"Found {len(dropdowns)} elements with selector: {selector}")
-                
-                for dropdown in dropdowns:
-                    if dropdown.is_displayed() and dropdown.is_enabled():
-                        print(f"Clicking dropdown with selector: {selector}")
-                        
-                        # Scroll into view
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", dropdown)
-                        time.sleep(1)
-                        
-                        # Try to click
-                        try:
-                            dropdown.click()
-                        except:
-                            driver.execute_script("arguments[0].click();", dropdown)
-                        
-                        time.sleep(3)
-                        dropdown_opened = True
-                        break
-                        
-                if dropdown_opened:
-                    break
-                    
-            except Exception as e:
-                print(f"Error with selector {selector}: {e}")
-                continue
+        dropdown_opened = open_os_dropdown(driver, readiness, selectors)
         
         if not dropdown_opened:
             print("Could not open any dropdown, trying direct Ubuntu element access...")
@@ -153,7 +144,7 @@ def select_ubuntu_os(driver):
         
         # Try CSS selectors first
         ubuntu_found = False
-        for selector, description in ubuntu_selectors:
+        for selector, description in selectors.order("ubuntu-option", ubuntu_selectors, key=lambda item: item[0]):
             try:
                 ubuntu_elements = driver.find_elements(By.CSS_SELECTOR, selector)
                 print(f"Found {len(ubuntu_elements)} elements for {description}")
@@ -172,50 +163,13 @@ def select_ubuntu_os(driver):
                             
                             # Scroll to element
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", ubuntu_element)
-                            time.sleep(2)
-                            
-                            # Multiple click attempts
-                            click_success = False
-                            
-                            # Method 1: Regular click
-                            try:
-                                ubuntu_element.click()
-                                click_success = True
-                                print("Regular click successful")
-                            except Exception as e:
-                                print(f"Regular click failed: {e}")
-                            
-                            # Method 2: JavaScript click
-                            if not click_success:
-                                try:
-                                    driver.execute_script("arguments[0].click();", ubuntu_element)
-                                    click_success = True
-                                    print("JavaScript click successful")
-                                except Exception as e:
-                                    print(f"JavaScript click failed: {e}")
-                            
-                            # Method 3: Action chains
-                            if not click_success:
-                                try:
-                                    from selenium.webdriver.common.action_chains import ActionChains
-                                    ActionChains(driver).move_to_element(ubuntu_element).click().perform()
-                                    click_success = True
-                                    print("ActionChains click successful")
-                                except Exception as e:
-                                    print(f"ActionChains click failed: {e}")
                             
-                            # Method 4: Force click with coordinates
-                            if not click_success:
-                                try:
-                                    driver.execute_script("arguments[0].click(); arguments[0].dispatchEvent(new Event('change'));", ubuntu_element)
-                                    click_success = True
-                                    print("Force click with event successful")
-                                except Exception as e:
-                                    print(f"Force click failed: {e}")
+                            # Multiple click attempts, cached method first
+                            method = click_element(driver, ubuntu_element, selectors.order("click", CLICK_METHODS))
                             
-                            if click_success:
+                            if method:
                                 print("Click executed, waiting for page update...")
-                                time.sleep(8)  # Wait longer for page to update
+                                bin_count = readiness.wait_for_bin_links(legacy_sleep=10)
                                 
                                 # Check if selection worked
                                 new_url = driver.current_url
@@ -230,18 +184,20 @@ def select_ubuntu_os(driver):
                                     "US008" in new_url,
                                     "linux" in page_source,
                                     "lts" in page_source,
-                                    ".bin" in page_source and len(driver.find_elements(By.XPATH, "//a[contains(@href, '.bin') or contains(@href, '.BIN')]")) > 0
+                                    bin_count > 0
                                 ]
                                 
+                                selected = any(ubuntu_indicators) or bin_count > 10
+                                selectors.record("ubuntu-option", selector, selected)
+                                selectors.record("click", method, selected)
                                 if any(ubuntu_indicators):
                                     print("Successfully selected Ubuntu!")
                                     return True
                                 else:
                                     print("Selection didn't seem to work, checking for bin files anyway...")
                                     # Try to find .bin files even without Ubuntu confirmation
-                                    bin_check = driver.find_elements(By.XPATH, "//a[contains(@href, '.bin') or contains(@href, '.BIN')]")
-                                    if len(bin_check) > 10:  # If we found many bin files, Ubuntu selection probably worked
-                                        print(f"Found {len(bin_check)} .bin files, Ubuntu selection likely successful!")
+                                    if bin_count > 10:  # If we found many bin files, Ubuntu selection probably worked
+                                        print(f"Found {bin_count} .bin files, Ubuntu selection likely successful!")
                                         return True
                                     print("No .bin files found, trying next method...")
                             else:
@@ -250,13 +206,16 @@ def select_ubuntu_os(driver):
                     except Exception as e:
                         print(f"Error with element: {e}")
                         continue
+                
+                if not ubuntu_elements:
+                    selectors.record("ubuntu-option", selector, False)
                         
             except Exception as e:
                 print(f"Error with selector {selector}: {e}")
                 continue
         
         # Try XPath text-based selectors with enhanced clicking
-        for xpath in ubuntu_text_selectors:
+        for xpath in selectors.order("ubuntu-xpath", ubuntu_text_selectors):
             try:
                 ubuntu_elements = driver.find_elements(By.XPATH, xpath)
                 print(f"Found {len(ubuntu_elements)} elements with XPath: {xpath}")
@@ -280,31 +239,25 @@ def select_ubuntu_os(driver):
                             print(f"Attempting to click Ubuntu element with text: '{text[:50]}'...")
                             
                             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", ubuntu_element)
-                            time.sleep(2)
                             
-                            # Try multiple click methods for text-based elements too
-                            click_methods = [
-                                ("Regular click", lambda: ubuntu_element.click()),
-                                ("JavaScript click", lambda: driver.execute_script("arguments[0].click();", ubuntu_element)),
-                                ("Force click with event", lambda: driver.execute_script("arguments[0].click(); arguments[0].dispatchEvent(new Event('change')); arguments[0].dispatchEvent(new Event('input'));", ubuntu_element))
-                            ]
-                            
-                            for method_name, click_func in click_methods:
+                            # Try multiple click methods for text-based elements too, cached method first
+                            for method_name in selectors.order("click", CLICK_METHODS):
                                 try:
-                                    print(f"  Trying {method_name}...")
-                                    click_func()
-                                    time.sleep(8)
+                                    print(f"  Trying {method_name} click...")
+                                    click_with(driver, ubuntu_element, method_name)
+                                    bin_count = readiness.wait_for_bin_links(legacy_sleep=10)
                                     
-                                    # Check for .bin files immediately
-                                    bin_elements = driver.find_elements(By.XPATH, "//a[contains(@href, '.bin') or contains(@href, '.BIN')]")
-                                    print(f"  After {method_name}: Found {len(bin_elements)} .bin files")
+                                    print(f"  After {method_name} click: Found {bin_count} .bin files")
                                     
-                                    if len(bin_elements) > 10:
-                                        print(f"Successfully selected Ubuntu via text search with {method_name}!")
+                                    selected = bin_count > 10
+                                    selectors.record("ubuntu-xpath", xpath, selected)
+                                    selectors.record("click", method_name, selected)
+                                    if selected:
+                                        print(f"Successfully selected Ubuntu via text search with {method_name} click!")
                                         return True
                                     
                                 except Exception as e:
-                                    print(f"  {method_name} failed: {e}")
+                                    print(f"  {method_name} click failed: {e}")
                                     continue
                                 
                     except Exception as e:
@@ -323,7 +276,7 @@ def select_ubuntu_os(driver):
                 if ubuntu_element.is_displayed():
                     print(f"Trying fallback Ubuntu option: {data_value}")
                     driver.execute_script("arguments[0].click();", ubuntu_element)
-                    time.sleep(7)
+                    readiness.wait_for_bin_links(legacy_sleep=7)
                     return True
             except:
                 continue
@@ -336,7 +289,7 @@ def select_ubuntu_os(driver):
                 if rhel_element.is_displayed():
                     print(f"Trying RHEL option as final fallback: {data_value}")
                     driver.execute_script("arguments[0].click();", rhel_element)
-                    time.sleep(7)
+                    readiness.wait_for_bin_links(legacy_sleep=7)
                     return True
             except:
                 continue
@@ -349,42 +302,24 @@ def select_ubuntu_os(driver):
         import traceback
         traceback.print_exc()
         return False
-
-def download_file(url, filepath):
-    """Download a file with progress indication"""
-    try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r  Progress: {percent:.1f}%", end='', flush=True)
-        
-        print(f"\n  Successfully downloaded: {os.path.basename(filepath)}")
-        return True
-    except Exception as e:
-        print(f"\n  Error downloading {url}: {e}")
-        return False
+    
+    finally:
+        selectors.save()
 
 def find_bin_files(driver):
     """Enhanced search for .bin files using multiple methods"""
+    from selenium.webdriver.common.by import By
+    
     print("Searching for .bin/.BIN files using multiple methods...")
     
     bin_links = []
     
+    # One round-trip for every href and data-* attribute; filtering happens here
+    harvest = harvest_page(driver)
+    
     # Method 1: Direct href links
-    all_links = driver.find_elements(By.TAG_NAME, "a")
-    for link in all_links:
-        href = link.get_attribute("href")
-        if href and (href.lower().endswith(".bin") or href.endswith(".BIN")):
+    for href in harvest['hrefs']:
+        if href and href.lower().endswith(".bin"):
             bin_links.append(href)
     
     print(f"Method 1 - Direct href links: Found {len(bin_links)} .bin files")
@@ -408,22 +343,14 @@ def find_bin_files(driver):
         
         print(f"Method 2 - Page source regex: Found {len(bin_links)} total .bin files")
     
-    # Method 3: Look for download buttons and extract URLs
+    # Method 3: Look for download handlers that carry the URL
     if len(bin_links) == 0:
-        print("Method 3 - Checking download buttons...")
-        download_elements = driver.find_elements(By.XPATH, 
-            "//button[contains(@class, 'download') or contains(text(), '다운로드') or contains(text(), 'Download')] | "
-            "//a[contains(@class, 'download') or contains(text(), '다운로드') or contains(text(), 'Download')]"
-        )
+        print("Method 3 - Checking onclick handlers from the harvest...")
+        for attr_value in harvest['onclick']:
+            if is_bin_reference(attr_value):
+                bin_links.append(attr_value)
         
-        for element in download_elements:
-            # Check various attributes for download URLs
-            for attr in ['href', 'onclick', 'data-href', 'data-url', 'data-download-url']:
-                attr_value = element.get_attribute(attr)
-                if attr_value and ('.bin' in attr_value.lower() or '.BIN' in attr_value):
-                    bin_links.append(attr_value)
-        
-        print(f"Method 3 - Download buttons: Found {len(bin_links)} total .bin files")
+        print(f"Method 3 - Download handlers: Found {len(bin_links)} total .bin files")
     
     # Method 4: Look for any elements containing .bin references
     if len(bin_links) == 0:
@@ -438,31 +365,14 @@ def find_bin_files(driver):
             except:
                 pass
     
-    # Method 5: Check for data attributes on table rows or containers
+    # Method 5: Check data-* attributes on every element (already harvested)
     if len(bin_links) == 0:
-        print("Method 5 - Checking data attributes on table elements...")
-        try:
-            # Find elements that commonly have data attributes
-            table_elements = []
-            table_elements.extend(driver.find_elements(By.TAG_NAME, "tr"))
-            table_elements.extend(driver.find_elements(By.TAG_NAME, "td"))
-            table_elements.extend(driver.find_elements(By.TAG_NAME, "div"))
-            
-            for element in table_elements:
-                try:
-                    # Get all attributes of the element using JavaScript
-                    attrs = driver.execute_script(
-                        "var items = {}; for (index = 0; index < arguments[0].attributes.length; ++index) { items[arguments[0].attributes[index].name] = arguments[0].attributes[index].value }; return items;", 
-                        element
-                    )
-                    
-                    for attr_name, attr_value in attrs.items():
-                        if attr_name.startswith('data-') and attr_value and ('.bin' in attr_value.lower() or '.BIN' in attr_value):
-                            bin_links.append(attr_value)
-                except Exception:
-                    continue
-        except Exception as e:
-            print(f"Method 5 failed: {e}")
+        print("Method 5 - Checking data attributes from the harvest...")
+        for attr_value in harvest['data']:
+            if is_bin_reference(attr_value):
+                bin_links.append(attr_value)
+        
+        print(f"Method 5 - Data attributes: Found {len(bin_links)} total .bin files")
     
     # Remove duplicates
     bin_links = list(set(bin_links))
@@ -475,19 +385,81 @@ def find_bin_files(driver):
     
     return bin_links
 
-def main():
+def download_bin_links(bin_links, options, transport=None, published=None, drivers=None):
+    """Download the discovered files into downloads/Ubuntu_Server_22.04_LTS/"""
+    # Create OS-specific directory
+    os_name = "Ubuntu_Server_22.04_LTS"
+    os_dir = os.path.join("downloads", os_name)
+    os.makedirs(os_dir, exist_ok=True)
+    
+    # Older releases of a component the listing still carries are skipped (or pruned locally)
+    bin_links = apply_retention(bin_links, options, os_dir, drivers=drivers)
+    
+    # Build one job per file and hand them all to the scheduler
+    jobs = []
+    for i, url in enumerate(bin_links):
+        # Clean up URL if needed
+        if url.startswith('javascript:') or 'onclick' in url:
+            print(f"Skipping JavaScript URL: {url[:50]}...")
+            continue
+            
+        filename = os.path.basename(urlparse(url).path)
+        if not filename or '.' not in filename:
+            filename = f"download_{i}.bin"
+        
+        filepath = os.path.join(os_dir, filename)
+        jobs.append(DownloadJob(url, filepath, group=os_name, expected=(published or {}).get(url)))
+    
+    scheduler = scheduler_from_options(options, transport)
+    jobs = scheduler.run(jobs)
+    export_metrics(scheduler, options)
+    successful_downloads = sum(1 for job in jobs if job.ok)
+    
+    print(f"\n=== Download Summary ===")
+    print(f"Total files found: {len(bin_links)}")
+    print(f"Successfully downloaded: {successful_downloads}")
+    print(f"Failed downloads: {len(bin_links) - successful_downloads}")
+
+def main(options=None):
+    if options is None:
+        options = parse_args([])
+    
+    # One pooled keep-alive session for the catalog and every download
+    transport = HttpTransport(pool_size=options.download_workers * 2)
+    
+    # Try the browserless catalog first; Chrome is only needed if it fails
+    if options.discovery != "browser":
+        entries = fetch_bin_entries(PRODUCT_CODE, UBUNTU_OS_CODE, api_base=options.catalog_url,
+                                    session=transport.session)
+        bin_links = [entry["url"] for entry in entries]
+        if bin_links or options.discovery == "http":
+            download_bin_links(bin_links, options, transport, published_checksums(entries),
+                               driver_names(entries))
+            transport.close()
+            return
+        print("Catalog returned nothing, falling back to the browser...")
+    
+    profile = profile_from_options(options)
+    if profile is not None:
+        profile.acquire()
+    startup_started = time.monotonic()
     try:
-        driver = setup_driver()
+        driver = setup_driver(block=not options.no_block_resources, profile=profile)
     except Exception as e:
         print(f"Failed to initialize Chrome driver: {e}")
         return
+    startup = time.monotonic() - startup_started
+    
+    readiness = PageReadiness(driver, timeout=options.wait_timeout)
     
     try:
         print("Opening Dell Support page...")
+        load_started = time.monotonic()
         driver.get("https://www.dell.com/support/home/ko-kr")
         
         # Wait for page to load
-        time.sleep(3)
+        readiness.wait_for_document(legacy_sleep=3)
+        report_startup(profile, startup, time.monotonic() - load_started)
         
         # Try to find search input
         search_input = find_search_input(driver)
@@ -499,38 +471,40 @@ def main():
             print("Found search input, searching for PowerEdge R440...")
             search_input.clear()
             search_input.send_keys("PowerEdge R440")
+            from selenium.webdriver.common.keys import Keys
             search_input.send_keys(Keys.RETURN)
-            time.sleep(5)
+            readiness.wait_for_document(legacy_sleep=5)
             print("Navigating to drivers page...")
             driver.get("https://www.dell.com/support/home/ko-kr/product-support/product/poweredge-r440/drivers")
         
         # Wait for drivers page to load
         print("Loading drivers page...")
-        time.sleep(5)
+        readiness.wait_for_document(legacy_sleep=5)
         
         print(f"Current page URL: {driver.current_url}")
         
         # Try to select Ubuntu OS
         print("\n=== Attempting to select Ubuntu Server 20.04 LTS ===")
-        ubuntu_selected = select_ubuntu_os(driver)
+        ubuntu_selected = select_ubuntu_os(driver, readiness, selector_cache_from_options(options))
         
         if ubuntu_selected:
             print("Ubuntu OS selected successfully, waiting for page to update...")
-            time.sleep(5)
+            readiness.wait_for_bin_links(legacy_sleep=5)
         else:
             print("Could not select Ubuntu OS, proceeding with current page...")
         
+        readiness.report("Ubuntu Server")
+        resource_report(driver, "Ubuntu Server")
+        
         # Search for .bin files using enhanced methods
         bin_links = find_bin_files(driver)
         
         if len(bin_links) == 0:
             print("No .bin files found. Showing all available download types for reference...")
-            all_links = driver.find_elements(By.TAG_NAME, "a")
             download_links = []
             file_types = {}
             
-            for link in all_links:
-                href = link.get_attribute("href")
+            for href in harvest_page(driver)['hrefs']:
                 if href and any(ext in href.lower() for ext in ['.exe', '.bin', '.zip', '.msi']):
                     download_links.append(href)
                     ext = href.split('.')[-1].lower()
@@ -550,33 +524,9 @@ def main():
             # Use all download links if no .bin files found
             bin_links = download_links
         
-        # Create OS-specific directory
-        os_name = "Ubuntu_Server_22.04_LTS"
-        os_dir = os.path.join("downloads", os_name)
-        os.makedirs(os_dir, exist_ok=True)
-        
-        # Download files
-        successful_downloads = 0
-        for i, url in enumerate(bin_links):
-            # Clean up URL if needed
-            if url.startswith('javascript:') or 'onclick' in url:
-                print(f"Skipping JavaScript URL: {url[:50]}...")
-                continue
-                
-            filename = os.path.basename(urlparse(url).path)
-            if not filename or '.' not in filename:
-                filename = f"download_{i}.bin"
-            
-            filepath = os.path.join(os_dir, filename)
-            print(f"\nDownloading {i+1}/{len(bin_links)}: {filename}")
-            
-            if download_file(url, filepath):
-                successful_downloads += 1
-        
-        print(f"\n=== Download Summary ===")
-        print(f"Total files found: {len(bin_links)}")
-        print(f"Successfully downloaded: {successful_downloads}")
-        print(f"Failed downloads: {len(bin_links) - successful_downloads}")
+        # Reuse the browser's cookies for the downloads
+        transport.seed_from_driver(driver)
+        download_bin_links(bin_links, options, transport)
         
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -585,7 +535,34 @@ def main():
     
     finally:
         driver.quit()
+        transport.close()
+        if profile is not None:
+            profile.release()
         print("Browser closed.")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Download Dell PowerEdge R440 .bin drivers for Ubuntu Server")
+    parser.add_argument("--wait-timeout", type=float, default=READY_TIMEOUT,
+                        help=f"ceiling in seconds for each page readiness wait (default: {READY_TIMEOUT})")
+    parser.add_argument("--discovery", choices=["auto", "http", "browser"], default="auto",
+                        help="auto: HTTP catalog with browser fallback (default); "
+                             "http: catalog only; browser: Selenium only")
+    parser.add_argument("--no-block-resources", action="store_true",
+                        help="let Chrome load images, fonts, media and third-party trackers")
+    parser.add_argument("--profile-dir", default=None,
+                        help="reuse a persistent Chrome profile and disk cache under this directory "
+                             "(one locked slot per browser; default: fresh profile every run)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f"size cap in MB for each persistent profile (default: {DEFAULT_CACHE_SIZE_MB})")
+    parser.add_argument("--selector-cache", default=DEFAULT_SELECTOR_CACHE,
+                        help=f"file remembering which page selectors worked (default: {DEFAULT_SELECTOR_CACHE})")
+    parser.add_argument("--no-selector-cache", action="store_true",
+                        help="always try selectors in their fixed order")
+    parser.add_argument("--catalog-url", default=DELL_API_BASE,
+                        help=f"base URL of the driver listing API (default: {DELL_API_BASE})")
+    add_retention_arguments(parser)
+    add_scheduler_arguments(parser)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Fleet configuration: several server models discovered and downloaded in one run.
+
+The config is a JSON file listing each model's Dell product code and the
+OS codes wanted for it:
+
+    {
+        "models": [
+            {"product": "poweredge-r440", "name": "R440", "os": ["RHEL9", "US008", "XI80"]},
+            {"product": "poweredge-r640", "os": "all"},
+            {"product": "poweredge-r740", "os": {"XI80": "VMware ESXi 8.0"}}
+        ]
+    }
+
+"os" is a list of codes (names come from the known OS table), a mapping of
+code to name, or "all" for every known OS. "name" defaults to the product
+code and names the model's folder under downloads/.
+
+The last discovery is saved to downloads/catalog.json (one entry per
+product/OS with its .bin URLs and published checksums) so listing and
+verification commands, and downloads with --from-catalog, can run
+without scraping again.
+"""
+import json, os, re, time
+
+DEFAULT_SAVED_CATALOG = os.path.join("downloads", "catalog.json")
+
+
+def safe_name(name):
+    return re.sub(r'[<>:"/\\|?*]', '_', name)
+
+
+class DriverTarget:
+    """One product/OS pair to discover and download"""
+
+    def __init__(self, product, os_code, os_name, model=None):
+        self.product = product
+        self.os_code = os_code
+        self.os_name = os_name
+        # Set in fleet mode; single-model runs keep the old downloads/<OS>/ layout
+        self.model = model
+
+    @property
+    def label(self):
+        return f"{self.model} / {self.os_name}" if self.model else self.os_name
+
+    @property
+    def directory(self):
+        if self.model:
+            return os.path.join("downloads", safe_name(self.model), safe_name(self.os_name))
+        return os.path.join("downloads", safe_name(self.os_name))
+
+    def drivers_url(self, template):
+        """Drivers page for this product; `template` may contain {product}"""
+        return template.replace("{product}", self.product)
+
+
+def load_fleet(path, known_os):
+    """Read a fleet config into DriverTargets, in file order"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    targets = []
+    for model in config.get("models", []):
+        product = model["product"]
+        name = model.get("name", product)
+        wanted = model.get("os", "all")
+        if wanted == "all":
+            wanted = dict(known_os)
+        elif isinstance(wanted, list):
+            wanted = {code: known_os.get(code, code) for code in wanted}
+        for code, os_name in wanted.items():
+            targets.append(DriverTarget(product, code, os_name, model=name))
+
+    models = len({target.model for target in targets})
+    print(f"Fleet: {len(targets)} product/OS pairs across {models} models from {path}")
+    return targets
+
+
+def _catalog_key(product, os_code):
+    return f"{product}/{os_code}"
+
+
+def load_catalog(path=DEFAULT_SAVED_CATALOG):
+    """Read a saved catalog; raises OSError/ValueError if there is none"""
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    catalog.setdefault("targets", {})
+    return catalog
+
+
+def _catalog_file(url, published, drivers):
+    item = {"url": url, "published": published.get(url) or {}}
+    if drivers.get(url):
+        item["driver"] = drivers[url]
+    return item
+
+
+def save_catalog(bin_files_by_target, published, path=DEFAULT_SAVED_CATALOG, drivers=None):
+    """Merge freshly discovered targets into the saved catalog.
+
+    `drivers` maps URLs to the listing's driver names, kept for retention.
+
+    Targets not discovered this time keep their earlier entry, so partial
+    runs (one fleet model, a single OS) don't erase the rest.
+    """
+    try:
+        catalog = load_catalog(path)
+    except (OSError, ValueError):
+        catalog = {"targets": {}}
+
+    now = time.time()
+    drivers = drivers or {}
+    for target, bin_files in bin_files_by_target.items():
+        catalog["targets"][_catalog_key(target.product, target.os_code)] = {
+            "product": target.product,
+            "os_code": target.os_code,
+            "os_name": target.os_name,
+            "model": target.model,
+            "directory": target.directory,
+            "discovered": now,
+            "files": [_catalog_file(url, published, drivers) for url in bin_files],
+        }
+    catalog["saved"] = now
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    print(f"Saved {len(bin_files_by_target)} discovered targets to {path}")
+
+
+def catalog_targets(catalog):
+    """DriverTarget -> [urls], url -> published checksums and url -> driver name from a saved catalog"""
+    bin_files = {}
+    published = {}
+    drivers = {}
+    for entry in catalog["targets"].values():
+        target = DriverTarget(entry["product"], entry["os_code"], entry["os_name"], model=entry.get("model"))
+        bin_files[target] = [item["url"] for item in entry["files"]]
+        for item in entry["files"]:
+            if item.get("published"):
+                published[item["url"]] = item["published"]
+            if item.get("driver"):
+                drivers[item["url"]] = item["driver"]
+    return bin_files, published, drivers
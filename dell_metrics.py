@@ -0,0 +1,168 @@
+"""Download throughput and latency metrics.
+
+Per-file and per-run numbers are written as JSON and as a Prometheus
+textfile (for node_exporter's textfile collector) so CDN throughput can
+be graphed across nightly runs.
+"""
+import json, os, threading, time
+
+DEFAULT_METRICS_JSON = os.path.join("downloads", "download_metrics.json")
+DEFAULT_METRICS_PROM = os.path.join("downloads", "download_metrics.prom")
+
+# Window (seconds) over which peak throughput is measured
+PEAK_WINDOW = 1.0
+
+
+class ThroughputMeter:
+    """Tracks time-to-first-byte, bytes on the wire and peak throughput for one request"""
+
+    def __init__(self, info, request_started):
+        self.info = info
+        self.request_started = request_started
+        self.window_started = None
+        self.window_bytes = 0
+        info.setdefault("transferred", 0)
+        info.setdefault("peak_bps", 0.0)
+
+    def update(self, nbytes):
+        now = time.monotonic()
+        if self.window_started is None:
+            self.info["ttfb"] = now - self.request_started
+            self.window_started = now
+        self.info["transferred"] += nbytes
+        self.window_bytes += nbytes
+        elapsed = now - self.window_started
+        if elapsed >= PEAK_WINDOW:
+            self.info["peak_bps"] = max(self.info["peak_bps"], self.window_bytes / elapsed)
+            self.window_started = now
+            self.window_bytes = 0
+
+
+class DownloadMetrics:
+    """Collects one record per downloaded file plus run totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = []
+        self.started = time.time()
+        self.run = {}
+
+    def record(self, job, info, duration):
+        transferred = info.get("transferred", 0)
+        peak = info.get("peak_bps", 0.0)
+        average = transferred / duration if duration else 0.0
+        entry = {
+            "url": job.url,
+            "file": job.filename,
+            "group": job.group,
+            "status": info.get("status", "failed") if job.ok else "failed",
+            "bytes": transferred,
+            "size": info.get("size"),
+            "ttfb_seconds": info.get("ttfb"),
+            "duration_seconds": duration,
+            "avg_bytes_per_second": average,
+            # Short files never fill a peak window; their average is their peak
+            "peak_bytes_per_second": max(peak, average),
+            "retries": max(info.get("attempts", 1) - 1, 0),
+            "hedges": info.get("hedges", 0),
+        }
+        with self._lock:
+            self.files.append(entry)
+
+    def finish(self, makespan, jobs_total):
+        with self._lock:
+            total_bytes = sum(entry["bytes"] for entry in self.files)
+            self.run = {
+                "started": self.started,
+                "finished": time.time(),
+                "files_total": jobs_total,
+                "files_requested": len(self.files),
+                "files_failed": sum(1 for entry in self.files if entry["status"] == "failed"),
+                "files_not_modified": sum(1 for entry in self.files if entry["status"] == "not-modified"),
+                "bytes_total": total_bytes,
+                "makespan_seconds": makespan,
+                "avg_bytes_per_second": total_bytes / makespan if makespan else 0.0,
+                "retries_total": sum(entry["retries"] for entry in self.files),
+                "hedges_total": sum(entry["hedges"] for entry in self.files),
+            }
+        return self.run
+
+    def write_json(self, path):
+        with self._lock:
+            data = {"run": self.run, "files": self.files}
+        _write_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path):
+        lines = []
+
+        def metric(name, help_text, kind, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        with self._lock:
+            run = dict(self.run)
+            files = list(self.files)
+
+        metric("dell_download_run_files", "Files handed to the downloader in the last run", "gauge",
+               [({}, run.get("files_total"))])
+        metric("dell_download_run_failures", "Files that failed in the last run", "gauge",
+               [({}, run.get("files_failed"))])
+        metric("dell_download_run_bytes", "Bytes transferred in the last run", "gauge",
+               [({}, run.get("bytes_total"))])
+        metric("dell_download_run_makespan_seconds", "Wall-clock time of the download phase", "gauge",
+               [({}, run.get("makespan_seconds"))])
+        metric("dell_download_run_throughput_bytes_per_second", "Average throughput over the run", "gauge",
+               [({}, run.get("avg_bytes_per_second"))])
+        metric("dell_download_run_retries", "Retries across all files in the last run", "gauge",
+               [({}, run.get("retries_total"))])
+        metric("dell_download_run_hedges", "Requests raced on a second connection in the last run", "gauge",
+               [({}, run.get("hedges_total"))])
+        metric("dell_download_run_finished_timestamp_seconds", "When the last run finished", "gauge",
+               [({}, run.get("finished"))])
+
+        def labels(entry):
+            return {"file": entry["file"], "group": entry["group"] or "", "status": entry["status"]}
+
+        metric("dell_download_file_bytes", "Bytes transferred per file", "gauge",
+               [(labels(entry), entry["bytes"]) for entry in files])
+        metric("dell_download_file_ttfb_seconds", "Time to first byte per file", "gauge",
+               [(labels(entry), entry["ttfb_seconds"]) for entry in files])
+        metric("dell_download_file_duration_seconds", "Total download time per file", "gauge",
+               [(labels(entry), entry["duration_seconds"]) for entry in files])
+        metric("dell_download_file_avg_bytes_per_second", "Average throughput per file", "gauge",
+               [(labels(entry), entry["avg_bytes_per_second"]) for entry in files])
+        metric("dell_download_file_peak_bytes_per_second", "Peak throughput per file", "gauge",
+               [(labels(entry), entry["peak_bytes_per_second"]) for entry in files])
+        metric("dell_download_file_retries", "Retries per file", "gauge",
+               [(labels(entry), entry["retries"]) for entry in files])
+
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def report(self):
+        run = self.run
+        print(f"Metrics: {run.get('bytes_total', 0) / 1048576:.1f} MB at "
+              f"{run.get('avg_bytes_per_second', 0) / 1048576:.2f} MB/s, "
+              f"{run.get('retries_total', 0)} retries, {run.get('hedges_total', 0)} hedged requests, "
+              f"{run.get('files_failed', 0)} failures")
+        slowest = sorted(self.files, key=lambda entry: entry["duration_seconds"], reverse=True)[:3]
+        for entry in slowest:
+            ttfb = entry["ttfb_seconds"]
+            ttfb_text = f" (ttfb {ttfb:.2f}s)" if ttfb is not None else ""
+            print(f"  Slowest: {entry['file']} {entry['duration_seconds']:.1f}s{ttfb_text}")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
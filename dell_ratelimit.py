@@ -0,0 +1,198 @@
+"""Shared token-bucket bandwidth limiting for download workers.
+
+Every download stream draws from one global bucket and, optionally, a
+bucket for its host. Rates can follow time-of-day profiles and can be
+changed while a run is in progress through a small JSON file:
+
+    {
+        "global": "20M",
+        "per_host": "8M",
+        "profiles": [
+            {"start": "08:00", "end": "20:00", "global": "2M", "per_host": "1M"}
+        ]
+    }
+
+Rates are bytes per second with optional K/M/G suffixes; 0 or an empty
+value means unlimited. A profile covering the current local time
+overrides the base rates; a profile may wrap past midnight.
+"""
+import json, os, re, threading, time
+
+# How often (seconds) profiles and the config file are re-evaluated
+REFRESH_INTERVAL = 5.0
+
+
+def parse_rate(value):
+    """'2M' -> 2097152 bytes/s. Returns None for unlimited."""
+    if value in (None, "", 0, "0"):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) or None
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?)i?B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate: {value!r}")
+    multiplier = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(2).upper()]
+    return float(match.group(1)) * multiplier or None
+
+
+def _minutes(text):
+    hours, minutes = text.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_profiles(text):
+    """'08:00-20:00=2M,20:00-08:00=0' -> list of profile dicts"""
+    profiles = []
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        window, _, rate = item.partition("=")
+        start, _, end = window.partition("-")
+        profiles.append({"start": start, "end": end, "global": rate})
+    return profiles
+
+
+def _profile_active(profile, now_minutes):
+    start, end = _minutes(profile["start"]), _minutes(profile["end"])
+    if start <= end:
+        return start <= now_minutes < end
+    return now_minutes >= start or now_minutes < end
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Large reads may run the bucket into debt and wait it off."""
+
+    def __init__(self, rate=None, burst_seconds=1.0):
+        self._lock = threading.Lock()
+        self.burst_seconds = burst_seconds
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            if rate != self.rate:
+                self.rate = rate
+                self.tokens = min(self.tokens, rate * self.burst_seconds) if rate else 0.0
+                self.updated = time.monotonic()
+
+    def consume(self, nbytes):
+        """Take nbytes, sleeping as long as needed to stay under the rate"""
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            now = time.monotonic()
+            capacity = self.rate * self.burst_seconds
+            self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= nbytes
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class BandwidthLimiter:
+    """Global and per-host caps shared by every download stream"""
+
+    def __init__(self, global_rate=None, per_host_rate=None, profiles=None, config_path=None):
+        self.base = {"global": global_rate, "per_host": per_host_rate}
+        self.profiles = profiles or []
+        self.config_path = config_path
+        self._config_mtime = None
+        self._lock = threading.Lock()
+        self._global = TokenBucket()
+        self._hosts = {}
+        self._per_host_rate = None
+        self._next_refresh = 0.0
+        self.refresh(force=True)
+
+    @property
+    def enabled(self):
+        return bool(self._global.rate or self._per_host_rate)
+
+    def _load_config(self):
+        try:
+            mtime = os.path.getmtime(self.config_path)
+        except OSError:
+            return
+        if mtime == self._config_mtime:
+            return
+        try:
+            with open(self.config_path, encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring bandwidth config {self.config_path}: {e}")
+            return
+        self._config_mtime = mtime
+        self.base = {"global": config.get("global"), "per_host": config.get("per_host")}
+        self.profiles = config.get("profiles", [])
+        print(f"Loaded bandwidth config from {self.config_path}")
+
+    def refresh(self, force=False):
+        """Re-read the config file and apply whichever profile covers the current time"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_refresh:
+                return
+            self._next_refresh = now + REFRESH_INTERVAL
+            if self.config_path:
+                self._load_config()
+
+            rates = dict(self.base)
+            local = time.localtime()
+            now_minutes = local.tm_hour * 60 + local.tm_min
+            for profile in self.profiles:
+                if _profile_active(profile, now_minutes):
+                    for key in ("global", "per_host"):
+                        if key in profile:
+                            rates[key] = profile[key]
+                    break
+
+            global_rate, per_host_rate = parse_rate(rates["global"]), parse_rate(rates["per_host"])
+            if (global_rate, per_host_rate) != (self._global.rate, self._per_host_rate):
+                print(f"Bandwidth limit: global {_describe(global_rate)}, per host {_describe(per_host_rate)}")
+            self._global.set_rate(global_rate)
+            self._per_host_rate = per_host_rate
+            for bucket in self._hosts.values():
+                bucket.set_rate(per_host_rate)
+
+    def _host_bucket(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = TokenBucket(self._per_host_rate)
+            return self._hosts[host]
+
+    def chunk_cap(self, host):
+        """Largest read that keeps throttled streams smooth, or None if unlimited"""
+        rates = [rate for rate in (self._global.rate, self._per_host_rate) if rate]
+        return int(min(rates) / 4) if rates else None
+
+    def throttle(self, host, nbytes):
+        self.refresh()
+        waited = self._global.consume(nbytes)
+        if self._per_host_rate:
+            waited += self._host_bucket(host).consume(nbytes)
+        return waited
+
+
+def _describe(rate):
+    return f"{rate / 1048576:.2f} MB/s" if rate else "unlimited"
+
+
+def add_limiter_arguments(parser):
+    parser.add_argument("--limit-rate", default=None,
+                        help="global bandwidth cap shared by all downloads, e.g. 10M (default: unlimited)")
+    parser.add_argument("--limit-rate-per-host", default=None,
+                        help="bandwidth cap per download host, e.g. 4M (default: unlimited)")
+    parser.add_argument("--limit-profile", default=None,
+                        help="time-of-day global caps, e.g. '08:00-20:00=2M,20:00-08:00=0'")
+    parser.add_argument("--bandwidth-config", default=None,
+                        help="JSON file with global/per_host/profiles, re-read while running")
+
+
+def limiter_from_options(options):
+    limiter = BandwidthLimiter(parse_rate(options.limit_rate), parse_rate(options.limit_rate_per_host),
+                               parse_profiles(options.limit_profile), options.bandwidth_config)
+    if limiter.enabled or options.bandwidth_config or options.limit_profile:
+        return limiter
+    return None
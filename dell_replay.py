@@ -0,0 +1,335 @@
+"""Offline record/replay of the Dell drivers page for benchmarking the scrape path.
+
+Record the pages while scraping live dell.com:
+
+    python3 dell_driver_r440_all_os_downloader.py --discovery browser --record recordings
+
+Serve them to a browser, or benchmark the full discovery flow against them:
+
+    python3 dell_replay.py serve recordings --port 8000
+    python3 dell_replay.py bench recordings --repeat 3 -- --navigation url
+
+HTTP discovery records the fetchdriversbyproduct JSON instead, and the same
+server answers that endpoint, so the browserless path runs offline too:
+
+    python3 dell_driver_r440_all_os_downloader.py --discovery http --record recordings
+    python3 dell_replay.py serve recordings --port 8000
+    python3 dell_driver_r440_all_os_downloader.py --discovery http --discover-only \\
+        --catalog-url http://127.0.0.1:8000
+
+Each OS is stored as the DOM snapshot taken once its listing was on screen,
+keyed <product>/<OS code>; <product>/base is the plain drivers page, or the
+first OS page recorded when --navigation url never loads it. The replay
+server picks the product from the request path, so fleet recordings of
+several models replay side by side. Scripts, stylesheets and frames are
+stripped so nothing is fetched from the network, and a small script is
+injected that swaps in the recorded listing when an OS option is clicked,
+so dropdown selection, in-place switching and ?oscode= navigation all
+work offline.
+"""
+import argparse, json, os, re, statistics, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from dell_catalog import DRIVER_LIST_PATH
+
+INDEX_FILE = "index.json"
+# Recorded catalog listings, as listings/<product>/<OS code>.json
+LISTING_DIR = "listings"
+# The catalog endpoint's path after its locale segment
+LISTING_PATH_SUFFIX = DRIVER_LIST_PATH.split("{locale}", 1)[1]
+REPLAY_PREFIX = "/__replay__/os/"
+BASE_KEY = "base"
+# Product code in a drivers page path, /.../product/<product>/drivers
+PRODUCT_PATTERN = re.compile(r"/product/([^/]+)/drivers")
+
+# Tags that would pull resources from the network
+STRIP_PATTERNS = [
+    re.compile(r"<script\b.*?</script\s*>", re.IGNORECASE | re.DOTALL),
+    re.compile(r"<iframe\b.*?</iframe\s*>", re.IGNORECASE | re.DOTALL),
+    re.compile(r"<link\b[^>]*>", re.IGNORECASE),
+]
+
+REPLAY_JS = """<script>
+document.addEventListener('click', function (event) {
+    var option = event.target.closest('[data-value]');
+    if (!option) { return; }
+    var code = option.getAttribute('data-value');
+    fetch('%s' + encodeURIComponent(code)).then(function (response) {
+        return response.ok ? response.text() : null;
+    }).then(function (html) {
+        if (html === null) { return; }
+        var page = new DOMParser().parseFromString(html, 'text/html');
+        document.body.innerHTML = page.body.innerHTML;
+        history.replaceState(null, '', location.pathname + '?oscode=' + encodeURIComponent(code));
+    });
+}, true);
+</script>"""
+
+
+def page_key(product, name):
+    """Recording key for one product's base page or OS page"""
+    return f"{product}/{name}"
+
+
+def _safe(name):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def listing_path(root, product, os_code):
+    return os.path.join(root, LISTING_DIR, _safe(product), _safe(os_code) + ".json")
+
+
+class PageRecorder:
+    """Saves page snapshots under `root`, one HTML file per key"""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.index = load_index(root)
+
+    def has(self, key):
+        with self._lock:
+            return key in self.index
+
+    def save(self, key, page_source, url=None):
+        filename = _safe(key) + ".html"
+        with open(os.path.join(self.root, filename), "w", encoding="utf-8") as f:
+            f.write(page_source)
+        with self._lock:
+            self.index[key] = {"file": filename, "url": url, "recorded": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                               "size": len(page_source)}
+            tmp_path = os.path.join(self.root, INDEX_FILE + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, os.path.join(self.root, INDEX_FILE))
+        print(f"Recorded {key} ({len(page_source) / 1024:.0f} KB)")
+
+    def save_listing(self, product, os_code, data):
+        """Keep one catalog JSON response for the replay server's catalog endpoint"""
+        path = listing_path(self.root, product, os_code)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        print(f"Recorded catalog listing {product}/{os_code}")
+
+
+def load_index(root):
+    try:
+        with open(os.path.join(root, INDEX_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def sanitize(html):
+    for pattern in STRIP_PATTERNS:
+        html = pattern.sub("", html)
+    return html
+
+
+class ReplayServer:
+    """Serves recorded pages on 127.0.0.1; any path answers with its product's base page.
+
+    The catalog endpoint answers with the recorded listing for its
+    productcode/oscode parameters, or 404.
+    """
+
+    def __init__(self, root, port=0):
+        self.root = root
+        self.index = load_index(root)
+        self.has_listings = os.path.isdir(os.path.join(root, LISTING_DIR))
+        if not self.has_listings and not any(key.rpartition("/")[2] == BASE_KEY for key in self.index):
+            raise ValueError(f"No base page or catalog listing recorded in {root}")
+        self.products = sorted({key.partition("/")[0] for key in self.index if "/" in key})
+        self._pages = {}
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def page(self, key):
+        """Sanitized HTML for a recorded key, or None"""
+        if key not in self._pages:
+            # Recordings made before pages were keyed by product have bare keys
+            entry = self.index.get(key) or self.index.get(key.partition("/")[2])
+            if entry is None:
+                return None
+            with open(os.path.join(self.root, entry["file"]), encoding="utf-8") as f:
+                self._pages[key] = sanitize(f.read())
+        return self._pages[key]
+
+    def listing(self, product, os_code):
+        """Recorded catalog JSON (as bytes) for a product/OS pair, or None"""
+        try:
+            with open(listing_path(self.root, product, os_code), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                parsed = urlparse(self.path)
+                if parsed.path.endswith(LISTING_PATH_SUFFIX):
+                    params = parse_qs(parsed.query)
+                    data = server.listing(params.get("productcode", [""])[0], params.get("oscode", [""])[0])
+                    if data is None:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                if parsed.path.startswith(REPLAY_PREFIX):
+                    body = server.page(unquote(parsed.path[len(REPLAY_PREFIX):]))
+                else:
+                    product = server.product(parsed.path)
+                    code = parse_qs(parsed.query).get("oscode", [None])[0]
+                    body = server.page(page_key(product, code)) if code else None
+                    body = body or server.page(page_key(product, BASE_KEY))
+                    if body is not None:
+                        script = REPLAY_JS % (REPLAY_PREFIX + quote(product) + "/")
+                        body = body.replace("</body>", script + "</body>") if "</body>" in body else body + script
+
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def product(self, path):
+        """Product a request path is for; the first one recorded if the path names none"""
+        match = PRODUCT_PATTERN.search(path)
+        if match:
+            return unquote(match.group(1))
+        return self.products[0] if self.products else ""
+
+    def url(self, path="/"):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run_benchmark(root, repeat, extra_args):
+    """Run the all-OS browser discovery against the replay and collect phase timings"""
+    import dell_driver_r440_all_os_downloader as all_os
+    from dell_browser import selector_cache_from_options
+
+    server = ReplayServer(root).start()
+    # Keeps {product} so every recorded product is served its own pages
+    drivers_url = server.url(urlparse(all_os.DRIVERS_URL_TEMPLATE).path)
+    options = all_os.parse_args(["--discovery", "browser", "--drivers-url", drivers_url] + extra_args)
+    targets = []
+    for key in server.index:
+        product, _, code = key.rpartition("/")
+        if code == BASE_KEY:
+            continue
+        # Models are only named when several products were recorded, as in a fleet run
+        model = product if len(server.products) > 1 else None
+        targets.append(all_os.DriverTarget(product or all_os.PRODUCT_CODE, code, all_os.OS_OPTIONS.get(code, code),
+                                           model))
+    print(f"Replaying {len(targets)} recorded OS pages from {root} at {drivers_url}")
+
+    runs = []
+    try:
+        for run in range(1, repeat + 1):
+            print(f"\n=== Benchmark run {run}/{repeat} ===")
+            session = all_os.BrowserSession(block=not options.no_block_resources,
+                                            profile=all_os.profile_from_options(options),
+                                            selectors=selector_cache_from_options(options))
+            started = time.monotonic()
+            found = {}
+            try:
+                session.get()
+                for target in targets:
+                    found[target.label] = len(all_os.discover_with_browser(session, target, options))
+            finally:
+                session.quit()
+
+            phases = {}
+            for _, phase, seconds in session.phases:
+                phases[phase] = phases.get(phase, 0.0) + seconds
+            runs.append({"startup": session.startup, "phases": phases, "total": time.monotonic() - started,
+                         "files": found, "per_os": session.phases})
+    finally:
+        server.stop()
+    return runs
+
+
+def report_benchmark(runs):
+    print(f"\n{'='*60}\nREPLAY BENCHMARK ({len(runs)} runs, median seconds)\n{'='*60}")
+    names = ["startup"] + sorted({phase for run in runs for phase in run["phases"]}) + ["total"]
+    for name in names:
+        values = [run[name] if name in ("startup", "total") else run["phases"].get(name, 0.0) for run in runs]
+        values = [value for value in values if value is not None]
+        if values:
+            print(f"{name:>10}: {statistics.median(values):8.2f}   (min {min(values):.2f}, max {max(values):.2f})")
+
+    per_os = {}
+    for os_name, phase, seconds in runs[-1]["per_os"]:
+        phases = per_os.setdefault(os_name, {})
+        phases[phase] = phases.get(phase, 0.0) + seconds
+    print("\nLast run per OS:")
+    for os_name, phases in per_os.items():
+        detail = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in sorted(phases.items()))
+        print(f"  {os_name}: {runs[-1]['files'].get(os_name, 0)} files; {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record/replay harness for the Dell drivers page")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="serve recorded pages until interrupted")
+    serve.add_argument("root", help="directory written by --record")
+    serve.add_argument("--port", type=int, default=8000)
+    bench = commands.add_parser("bench", help="time the browser discovery flow against the recordings; "
+                                              "arguments after -- go to the all-OS downloader")
+    bench.add_argument("root", help="directory written by --record")
+    bench.add_argument("--repeat", type=int, default=1, help="number of runs (default: 1)")
+    bench.add_argument("--json", default=None, help="also write the raw timings to this file")
+    args, extra = parser.parse_known_args(argv)
+    extra = [arg for arg in extra if arg != "--"]
+
+    if args.command == "serve":
+        server = ReplayServer(args.root, args.port)
+        listings = "with" if server.has_listings else "without"
+        print(f"Serving {len(server.index)} recorded pages {listings} catalog listings at {server.url()}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    runs = run_benchmark(args.root, max(1, args.repeat), extra)
+    report_benchmark(runs)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2, ensure_ascii=False)
+        print(f"Timings written to {args.json}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,156 @@
+"""Version-aware retention for Dell BIN releases.
+
+Dell names packages <component>_<release id>_<platform>_<version>[_<revision>].BIN,
+e.g. BIOS_9J2TW_LN_2.13.3.BIN. The release id changes with every release,
+so files are grouped by the remaining name and ordered by version, then
+by the A-revision.
+
+Device-class names such as Network_Firmware or SAS-RAID_Firmware are
+shipped by several vendors (Intel, Broadcom and Mellanox network firmware
+all look alike), so for those the catalog's driver name, with its version
+removed, is added to the group. Without a driver name such files keep
+their release id and are never grouped.
+
+Policies:
+    newest  download only the newest release(s) per component (default)
+    prune   as newest, and delete superseded releases from the OS folder
+    all     download everything the listing returns
+
+Names that don't parse are never skipped or pruned.
+"""
+import os, re
+from urllib.parse import urlparse
+
+RETENTION_POLICIES = ["newest", "prune", "all"]
+
+VERSION_PATTERN = re.compile(r"\d+(?:\.\d+)+")
+REVISION_PATTERN = re.compile(r"A(\d{2})")
+PLATFORM_PATTERN = re.compile(r"(?:LN|WN|UN)(?:32|64)?")
+# Five-character release id such as 6JCWV or XGPFC
+RELEASE_ID_PATTERN = re.compile(r"[0-9A-Z]{5}")
+# Name parts that say what kind of device a package is for, not whose; a name made
+# only of these is shared by several vendors' packages
+GENERIC_NAMES = {
+    "firmware", "driver", "drivers", "application", "utility",
+    "network", "sas-raid", "sas-non-raid", "sas-drive", "serial-ata", "fibre-channel",
+    "express-flash-pcie-ssd", "nvme", "storage", "video", "chipset",
+}
+# Words and numbers in a catalog driver name that change from release to release
+DRIVER_NAME_NOISE = re.compile(r"\b(?:version|ver\.?|v?\d+(?:\.\d+)+|A\d{2})\b", re.IGNORECASE)
+
+
+def driver_family(driver_name):
+    """'Intel NIC Family Version 22.0.9 Firmware' -> 'intel nic family firmware'"""
+    return " ".join(DRIVER_NAME_NOISE.sub(" ", driver_name).lower().split())
+
+
+def parse_bin_name(name, driver_name=None):
+    """'BIOS_9J2TW_LN_2.13.3.BIN' -> ('bios_ln', ((2, 13, 3), 0)).
+
+    `driver_name` is the catalog's name for the package; it tells apart
+    device-class names that several vendors share. Returns None for names
+    without a recognisable version.
+    """
+    stem, ext = os.path.splitext(os.path.basename(name))
+    if ext.lower() != ".bin":
+        return None
+    tokens = stem.split("_")
+
+    revision = 0
+    if len(tokens) > 2 and REVISION_PATTERN.fullmatch(tokens[-1]):
+        revision = int(tokens.pop()[1:])
+
+    for i in range(len(tokens) - 1, 0, -1):
+        if VERSION_PATTERN.fullmatch(tokens[i]):
+            break
+    else:
+        return None
+    version = tuple(int(part) for part in tokens[i].split("."))
+
+    component = tokens[:i] + tokens[i + 1:]
+    # The release id sits in front of the platform token (or the version)
+    end = i - 1 if PLATFORM_PATTERN.fullmatch(tokens[i - 1]) else i
+    if end > 1 and RELEASE_ID_PATTERN.fullmatch(tokens[end - 1]):
+        shared = all(token.lower() in GENERIC_NAMES for token in tokens[:end - 1])
+        family = driver_family(driver_name) if shared and driver_name else None
+        if not shared:
+            del component[end - 1]
+        elif family:
+            component[end - 1] = family
+        # A shared name without a driver name keeps its release id: nothing to group it by
+    return "_".join(component).lower(), (version, revision)
+
+
+def _filename(url):
+    return os.path.basename(urlparse(url).path)
+
+
+def newest_releases(names, keep=1, drivers=None):
+    """Return the names that fall outside the `keep` newest versions of their component.
+
+    `drivers` maps file names to catalog driver names where they are known.
+    """
+    drivers = drivers or {}
+    parsed_names = {name: parse_bin_name(name, drivers.get(name)) for name in names}
+    versions = {}
+    for name in names:
+        parsed = parsed_names[name]
+        if parsed is not None:
+            versions.setdefault(parsed[0], set()).add(parsed[1])
+    newest = {component: sorted(found, reverse=True)[:keep] for component, found in versions.items()}
+
+    superseded = []
+    for name in names:
+        parsed = parsed_names[name]
+        if parsed is not None and parsed[1] not in newest[parsed[0]]:
+            superseded.append(name)
+    return superseded
+
+
+def prune_superseded(directory, current, keep=1, drivers=None):
+    """Delete BINs in `directory` older than the `keep` newest per component.
+
+    `current` are the file names the listing still offers; they count
+    towards the newest versions even before they are downloaded. `drivers`
+    is as for newest_releases().
+    """
+    try:
+        local = [name for name in os.listdir(directory) if name.lower().endswith(".bin")]
+    except OSError:
+        return []
+    pruned = []
+    for name in newest_releases(sorted(set(local) | set(current)), keep, drivers):
+        if name in local:
+            os.remove(os.path.join(directory, name))
+            pruned.append(name)
+    for name in pruned:
+        print(f"Pruned superseded release {name}")
+    return pruned
+
+
+def apply_retention(bin_files, options, directory=None, label=None, drivers=None):
+    """Filter one OS's URLs by the retention policy in options, pruning `directory` if asked.
+
+    `drivers` maps URLs to the catalog's driver names (see dell_catalog.driver_names()).
+    """
+    if options.retention == "all":
+        return list(bin_files)
+    keep = max(1, options.keep_versions)
+    names = {_filename(url): name for url, name in (drivers or {}).items()}
+    superseded = set(newest_releases([_filename(url) for url in bin_files], keep, names))
+    kept = [url for url in bin_files if _filename(url) not in superseded]
+    if superseded:
+        where = f" for {label}" if label else ""
+        print(f"Retention: skipping {len(bin_files) - len(kept)} superseded releases{where}, "
+              f"keeping the newest {keep} per component")
+    if options.retention == "prune" and directory:
+        prune_superseded(directory, [_filename(url) for url in kept], keep, names)
+    return kept
+
+
+def add_retention_arguments(parser):
+    parser.add_argument("--retention", choices=RETENTION_POLICIES, default="newest",
+                        help="newest: download only the newest release per component (default); "
+                             "prune: also delete superseded releases locally; all: download everything")
+    parser.add_argument("--keep-versions", type=int, default=1,
+                        help="releases per component kept by --retention newest/prune (default: 1)")
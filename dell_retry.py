@@ -0,0 +1,136 @@
+"""Retry policy for downloads: timeouts, backoff with jitter, Retry-After and hedging.
+
+Each request gets a connect timeout and a read timeout (the longest the
+socket may sit idle), so a stalled connection fails instead of hanging
+the run. Failed attempts are retried after exponential backoff with full
+jitter; an attempt that made progress resumes from the .part file right
+away. A 429/503 Retry-After is honoured up to MAX_RETRY_AFTER.
+
+With hedging on, a request that hasn't answered within the hedge delay
+gets a second identical request on another pooled connection; whichever
+answers first is used and the other is closed. A body that stops
+arriving for as long continues from the bytes received with a Range
+request on another connection (see dell_downloader._fetch_part()).
+"""
+import random, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+
+# Longest Retry-After (seconds) we are willing to sleep for
+MAX_RETRY_AFTER = 300.0
+
+# Status codes worth retrying even though they are client errors
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+def parse_retry_after(value):
+    """Retry-After as seconds: either delta-seconds or an HTTP date. None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class RetryPolicy:
+    """How often and how patiently to retry one download"""
+
+    def __init__(self, attempts=5, connect_timeout=10.0, read_timeout=30.0, backoff=1.0, max_backoff=60.0,
+                 hedge_after=None):
+        self.attempts = max(1, attempts)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Seconds without a response before a second request is raced; None disables hedging
+        self.hedge_after = hedge_after
+
+    @property
+    def timeout(self):
+        """(connect, read) as requests expects it"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def should_retry(self, error):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        # Client errors won't change on retry
+        return not (status is not None and 400 <= status < 500 and status not in RETRYABLE_CLIENT_ERRORS)
+
+    def delay(self, failures, error=None):
+        """Seconds to wait after `failures` consecutive attempts without progress"""
+        if failures <= 0:
+            return 0.0
+        response = getattr(error, "response", None)
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (failures - 1)))
+
+    def get(self, transport, url, info=None, **kwargs):
+        """transport.get() with this policy's timeouts, hedged when hedge_after is set"""
+        kwargs.setdefault("timeout", self.timeout)
+        if not self.hedge_after:
+            return transport.get(url, **kwargs)
+
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = [pool.submit(transport.get, url, **kwargs)]
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done:
+                print(f"  No response after {self.hedge_after:.1f}s, hedging {url.rsplit('/', 1)[-1]} "
+                      f"on a second connection")
+                if info is not None:
+                    info["hedges"] = info.get("hedges", 0) + 1
+                futures.append(pool.submit(transport.get, url, **kwargs))
+
+            pending = set(futures)
+            error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                winner = None
+                for future in done:
+                    if future.exception() is not None:
+                        error = future.exception()
+                    elif winner is None:
+                        winner = future.result()
+                    else:
+                        future.result().close()
+                if winner is not None:
+                    # The request that lost the race is closed once it answers
+                    for future in pending:
+                        future.add_done_callback(_close_response)
+                    return winner
+            raise error
+        finally:
+            pool.shutdown(wait=False)
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+def add_retry_arguments(parser):
+    parser.add_argument("--retries", type=int, default=5,
+                        help="attempts per file before giving up (default: 5)")
+    parser.add_argument("--connect-timeout", type=float, default=10.0,
+                        help="seconds to wait for a connection (default: 10)")
+    parser.add_argument("--read-timeout", type=float, default=30.0,
+                        help="seconds a connection may stay silent before the attempt fails (default: 30)")
+    parser.add_argument("--backoff", type=float, default=1.0,
+                        help="base of the exponential backoff between attempts, in seconds (default: 1)")
+    parser.add_argument("--hedge-after", type=float, default=None,
+                        help="race a second request when the first hasn't answered within this many "
+                             "seconds, and continue a download stalled that long on a second connection "
+                             "(default: off)")
+
+
+def retry_policy_from_options(options):
+    return RetryPolicy(attempts=options.retries, connect_timeout=options.connect_timeout,
+                       read_timeout=options.read_timeout, backoff=options.backoff,
+                       hedge_after=options.hedge_after)
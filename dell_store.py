@@ -0,0 +1,203 @@
+"""Content-addressed blob store for downloaded BIN files.
+
+Every unique file is kept once under `<root>/blobs/<aa>/<sha256>` and the
+per-OS folders only hold hardlinks (or symlinks) into it. `index.json`
+maps each URL to the hash of the blob it produced, so a URL listed under
+several operating systems is fetched once.
+
+The store may be shared by concurrent runs (e.g. several Jenkins jobs on
+one agent pointing --store-dir at the same directory). Each URL is fetched
+under an exclusive fcntl lock in `<root>/locks/`, so a second run waits for
+the first and links the finished blob, and index.json is re-read and
+merged under its own lock before every write.
+
+`Manifest` is the run-to-run record in downloads/download_info.json:
+size, ETag, Last-Modified and SHA-256 per URL, used to revalidate files
+with conditional GETs instead of fetching them again.
+"""
+import contextlib, hashlib, json, os, shutil, threading, time
+
+try:
+    import fcntl
+except ImportError:  # Windows: the store is not shared between processes
+    fcntl = None
+
+DEFAULT_STORE_DIR = os.path.join("downloads", ".store")
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Blobs keyed by SHA-256, looked up by URL"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.staging_dir = os.path.join(root, "staging")
+        self.lock_dir = os.path.join(root, "locks")
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._index_mtime = None
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            self._index_mtime = os.stat(self.index_path).st_mtime_ns
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _refresh_index(self):
+        """Pick up entries other processes wrote since we last read the index"""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._index_mtime:
+            self.index = self._load_index()
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    @contextlib.contextmanager
+    def _flock(self, name, waiting_message=None):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.lock_dir, name), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if waiting_message:
+                    print(waiting_message)
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def url_lock(self, url, label=None):
+        """Exclusive lock on fetching `url`, held across every process using this store"""
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest() + ".lock"
+        return self._flock(name, f"Waiting for another process to finish {label or url}")
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def staging_path(self, url):
+        """Stable download location for a URL, so .part files resume across runs"""
+        return os.path.join(self.staging_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def lookup(self, url):
+        """Return the blob path for a URL fetched earlier, or None"""
+        with self._lock:
+            if url not in self.index:
+                self._refresh_index()
+            digest = self.index.get(url, {}).get("sha256")
+        if digest and os.path.exists(self.blob_path(digest)):
+            return self.blob_path(digest)
+        return None
+
+    def add(self, url, path, digest=None):
+        """Move a finished download into the store and return its blob path"""
+        digest = digest or file_sha256(path)
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if os.path.exists(blob):
+            # Same bytes under a different URL
+            os.remove(path)
+        else:
+            os.replace(path, blob)
+        with self._lock, self._flock("index.lock"):
+            self._refresh_index()
+            self.index[url] = {"sha256": digest, "size": os.path.getsize(blob)}
+            self._save_index()
+        return blob
+
+    def link(self, blob, dest):
+        """Expose a blob at dest as a hardlink, falling back to a symlink, then a copy"""
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        # rename() onto another link to the same file is a no-op and would leave tmp_path behind
+        if os.path.exists(dest) and os.path.samefile(blob, dest):
+            return
+        tmp_path = dest + ".link"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(blob), tmp_path)
+            except OSError:
+                shutil.copy2(blob, tmp_path)
+        os.replace(tmp_path, dest)
+
+
+DEFAULT_MANIFEST_PATH = os.path.join("downloads", "download_info.json")
+
+
+class Manifest:
+    """Persistent record of every downloaded URL, used for conditional GETs"""
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault("files", {})
+        return data
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.data["updated"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def get(self, url):
+        with self._lock:
+            return dict(self.data["files"].get(url, {}))
+
+    def update(self, url, **fields):
+        with self._lock:
+            entry = self.data["files"].setdefault(url, {})
+            for key, value in fields.items():
+                if value is not None:
+                    entry[key] = value
+
+    def add_paths(self, url, paths):
+        with self._lock:
+            entry = self.data["files"].setdefault(url, {})
+            entry["paths"] = sorted(set(entry.get("paths", [])) | set(paths))
+
+    def validators(self, url):
+        """Conditional request headers for a URL seen in an earlier run"""
+        entry = self.get(url)
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers